@@ -0,0 +1,36 @@
+"""add drop_off_point visibility indexes
+
+Revision ID: 3c8d1f5a9b27
+Revises: e61f4b7a2c85
+Create Date: 2026-10-17 14:48:03.215907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8d1f5a9b27'
+down_revision = 'e61f4b7a2c85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_dropoffpoint_owner_id_id', 'dropoffpoint', ['owner_id', 'id'], unique=False)
+    op.create_index(
+        'ix_dropoffpoint_responsible_id',
+        'dropoffpoint',
+        ['responsible_id'],
+        unique=False,
+        postgresql_where=sa.text('responsible_id IS NOT NULL'),
+    )
+    op.create_index('ix_memberof_member_id_is_pending_id', 'memberof', ['member_id', 'is_pending', 'id'], unique=False)
+    op.create_index('ix_memberof_organization_id_member_id', 'memberof', ['organization_id', 'member_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_memberof_organization_id_member_id', table_name='memberof')
+    op.drop_index('ix_memberof_member_id_is_pending_id', table_name='memberof')
+    op.drop_index('ix_dropoffpoint_responsible_id', table_name='dropoffpoint')
+    op.drop_index('ix_dropoffpoint_owner_id_id', table_name='dropoffpoint')
@@ -0,0 +1,50 @@
+"""add geocode status to drop_off_point
+
+Revision ID: 4a8e2c61f0d9
+Revises: b3f1c9d2a7e4
+Create Date: 2026-10-17 10:41:07.302118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4a8e2c61f0d9'
+down_revision = 'b3f1c9d2a7e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dropoffpoint', sa.Column('geocode_status', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False, server_default='pending'))
+    op.add_column('dropoffpoint', sa.Column('geocode_attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('dropoffpoint', sa.Column('geocode_next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+    op.alter_column('dropoffpoint', 'geocode_status', server_default=None)
+    op.alter_column('dropoffpoint', 'geocode_attempts', server_default=None)
+
+    # Backfill: rows that already have coordinates are done, rows without an
+    # address have nothing to geocode, the rest stay pending for the worker
+    op.execute(
+        "UPDATE dropoffpoint SET geocode_status = 'done' "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE dropoffpoint SET geocode_status = 'skipped' "
+        "WHERE (address IS NULL OR address = '') AND geocode_status = 'pending'"
+    )
+    op.create_index(
+        'ix_dropoffpoint_geocode_pending',
+        'dropoffpoint',
+        ['geocode_next_attempt_at'],
+        unique=False,
+        postgresql_where=sa.text("geocode_status = 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_dropoffpoint_geocode_pending', table_name='dropoffpoint')
+    op.drop_column('dropoffpoint', 'geocode_next_attempt_at')
+    op.drop_column('dropoffpoint', 'geocode_attempts')
+    op.drop_column('dropoffpoint', 'geocode_status')
@@ -0,0 +1,45 @@
+"""make memberof organization and member unique
+
+Revision ID: 5e9a3c7d1b48
+Revises: 7b2e5d9c4f16
+Create Date: 2026-10-17 19:26:51.408213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a3c7d1b48'
+down_revision = '7b2e5d9c4f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicate memberships collapse into the accepted one if any, drop off
+    # points they were responsible for are moved over before the delete cascades.
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE memberof_duplicate ON COMMIT DROP AS
+        SELECT id, first_value(id) OVER (
+            PARTITION BY organization_id, member_id ORDER BY is_pending, id
+        ) AS kept_id
+        FROM memberof
+        """
+    )
+    op.execute("DELETE FROM memberof_duplicate WHERE id = kept_id")
+    op.execute(
+        """
+        UPDATE dropoffpoint SET responsible_id = memberof_duplicate.kept_id
+        FROM memberof_duplicate WHERE dropoffpoint.responsible_id = memberof_duplicate.id
+        """
+    )
+    op.execute("DELETE FROM memberof USING memberof_duplicate WHERE memberof.id = memberof_duplicate.id")
+    op.drop_index('ix_memberof_organization_id_member_id', table_name='memberof')
+    op.create_index('ix_memberof_organization_id_member_id', 'memberof', ['organization_id', 'member_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_memberof_organization_id_member_id', table_name='memberof')
+    op.create_index('ix_memberof_organization_id_member_id', 'memberof', ['organization_id', 'member_id'], unique=False)
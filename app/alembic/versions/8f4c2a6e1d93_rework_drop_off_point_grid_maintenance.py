@@ -0,0 +1,215 @@
+"""rework drop_off_point grid maintenance
+
+Revision ID: 8f4c2a6e1d93
+Revises: 5e9a3c7d1b48
+Create Date: 2026-10-18 09:41:07.352816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4c2a6e1d93'
+down_revision = '5e9a3c7d1b48'
+branch_labels = None
+depends_on = None
+
+# Frozen as of this revision, changing app.core.geo.CLUSTER_MAX_PRECISION
+# needs a migration that recreates dropoffpoint_grid_apply_changes
+CLUSTER_MAX_PRECISION = 7
+# Must match app.core.geo.GRID_COORDINATE_SCALE
+GRID_COORDINATE_SCALE = 10_000_000
+
+
+def upgrade():
+    op.execute("DROP TRIGGER dropoffpoint_grid_update ON dropoffpoint")
+    op.execute("DROP TRIGGER dropoffpoint_grid_insert_delete ON dropoffpoint")
+    op.execute("DROP FUNCTION dropoffpoint_grid_trigger()")
+    op.execute("DROP FUNCTION dropoffpoint_grid_apply(text, uuid, double precision, double precision, boolean, integer)")
+
+    # Coordinates are summed as integers scaled by GRID_COORDINATE_SCALE, so
+    # removing a point subtracts exactly what adding it added
+    op.drop_column('dropoffpointgridcell', 'latitude_sum')
+    op.drop_column('dropoffpointgridcell', 'longitude_sum')
+    op.add_column('dropoffpointgridcell', sa.Column('latitude_e7_sum', sa.BigInteger(), nullable=False, server_default='0'))
+    op.add_column('dropoffpointgridcell', sa.Column('longitude_e7_sum', sa.BigInteger(), nullable=False, server_default='0'))
+    op.alter_column('dropoffpointgridcell', 'latitude_e7_sum', server_default=None)
+    op.alter_column('dropoffpointgridcell', 'longitude_e7_sum', server_default=None)
+
+    # One run per statement instead of per row: the changed points are
+    # aggregated into one delta per (precision, cell, owner_id) and applied by
+    # a single upsert sorted on that key. Every statement therefore locks grid
+    # rows in the same order, so concurrent multi-row changes of the same
+    # owner's points wait on each other instead of deadlocking. Rows left
+    # empty are deleted. Deltas for an owner being deleted are skipped, its
+    # rows go with the owner through the foreign key.
+    op.execute(f"""
+        CREATE FUNCTION dropoffpoint_grid_apply_changes() RETURNS trigger AS $$
+        DECLARE
+            changes text;
+            delta text;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                changes := 'SELECT geohash, owner_id, latitude, longitude, is_done, 1 AS sign FROM new_points';
+            ELSIF TG_OP = 'DELETE' THEN
+                changes := 'SELECT geohash, owner_id, latitude, longitude, is_done, -1 AS sign FROM old_points';
+            ELSE
+                changes := 'SELECT geohash, owner_id, latitude, longitude, is_done, -1 AS sign FROM old_points '
+                    'UNION ALL SELECT geohash, owner_id, latitude, longitude, is_done, 1 FROM new_points';
+            END IF;
+            delta := format($delta$
+                SELECT p AS precision, substr(geohash, 1, p) AS cell, owner_id,
+                       sum(sign) AS count,
+                       sum(CASE WHEN is_done THEN sign ELSE 0 END) AS done_count,
+                       sum(sign * round(latitude * {GRID_COORDINATE_SCALE})::bigint) AS latitude_e7_sum,
+                       sum(sign * round(longitude * {GRID_COORDINATE_SCALE})::bigint) AS longitude_e7_sum
+                FROM (%s) AS changes, generate_series(1, {CLUSTER_MAX_PRECISION}) AS p
+                WHERE geohash IS NOT NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+                GROUP BY 1, 2, 3
+                HAVING sum(sign) <> 0
+                    OR sum(CASE WHEN is_done THEN sign ELSE 0 END) <> 0
+                    OR sum(sign * round(latitude * {GRID_COORDINATE_SCALE})::bigint) <> 0
+                    OR sum(sign * round(longitude * {GRID_COORDINATE_SCALE})::bigint) <> 0
+            $delta$, changes);
+
+            EXECUTE format($upsert$
+                INSERT INTO dropoffpointgridcell AS g
+                    (precision, cell, owner_id, count, done_count, latitude_e7_sum, longitude_e7_sum)
+                SELECT * FROM (%s) AS d
+                WHERE EXISTS (SELECT 1 FROM "user" WHERE "user".id = d.owner_id)
+                ORDER BY precision, cell, owner_id
+                ON CONFLICT (precision, cell, owner_id) DO UPDATE SET
+                    count = g.count + excluded.count,
+                    done_count = g.done_count + excluded.done_count,
+                    latitude_e7_sum = g.latitude_e7_sum + excluded.latitude_e7_sum,
+                    longitude_e7_sum = g.longitude_e7_sum + excluded.longitude_e7_sum
+            $upsert$, delta);
+            EXECUTE format($purge$
+                DELETE FROM dropoffpointgridcell
+                WHERE count = 0 AND (precision, cell, owner_id) IN (
+                    SELECT precision, cell, owner_id FROM (%s) AS d WHERE d.count < 0
+                )
+            $purge$, delta);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    # Transition tables need one trigger per event
+    for event, transition in [
+        ('INSERT', 'NEW TABLE AS new_points'),
+        ('UPDATE', 'OLD TABLE AS old_points NEW TABLE AS new_points'),
+        ('DELETE', 'OLD TABLE AS old_points'),
+    ]:
+        op.execute(f"""
+            CREATE TRIGGER dropoffpoint_grid_{event.lower()}
+            AFTER {event} ON dropoffpoint
+            REFERENCING {transition}
+            FOR EACH STATEMENT EXECUTE FUNCTION dropoffpoint_grid_apply_changes();
+        """)
+
+    # Start from exact aggregates, dropping the drift and empty rows of the per-row triggers
+    op.execute("LOCK TABLE dropoffpoint IN SHARE MODE")
+    op.execute("DELETE FROM dropoffpointgridcell")
+    op.execute(f"""
+        INSERT INTO dropoffpointgridcell
+            (precision, cell, owner_id, count, done_count, latitude_e7_sum, longitude_e7_sum)
+        SELECT p, substr(geohash, 1, p), owner_id, count(*),
+               count(*) FILTER (WHERE is_done),
+               sum(round(latitude * {GRID_COORDINATE_SCALE})::bigint),
+               sum(round(longitude * {GRID_COORDINATE_SCALE})::bigint)
+        FROM dropoffpoint, generate_series(1, {CLUSTER_MAX_PRECISION}) AS p
+        WHERE geohash IS NOT NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+        GROUP BY p, substr(geohash, 1, p), owner_id
+    """)
+
+
+def downgrade():
+    for event in ('insert', 'update', 'delete'):
+        op.execute(f"DROP TRIGGER dropoffpoint_grid_{event} ON dropoffpoint")
+    op.execute("DROP FUNCTION dropoffpoint_grid_apply_changes()")
+
+    op.drop_column('dropoffpointgridcell', 'latitude_e7_sum')
+    op.drop_column('dropoffpointgridcell', 'longitude_e7_sum')
+    op.add_column('dropoffpointgridcell', sa.Column('latitude_sum', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('dropoffpointgridcell', sa.Column('longitude_sum', sa.Float(), nullable=False, server_default='0'))
+    op.alter_column('dropoffpointgridcell', 'latitude_sum', server_default=None)
+    op.alter_column('dropoffpointgridcell', 'longitude_sum', server_default=None)
+
+    # The per-row triggers of e61f4b7a2c85
+    op.execute(f"""
+        CREATE FUNCTION dropoffpoint_grid_apply(
+            p_geohash text, p_owner uuid, p_lat double precision, p_lon double precision,
+            p_done boolean, p_sign integer
+        ) RETURNS void AS $$
+        DECLARE
+            p integer;
+            done integer := CASE WHEN coalesce(p_done, false) THEN 1 ELSE 0 END;
+        BEGIN
+            IF p_geohash IS NULL OR p_lat IS NULL OR p_lon IS NULL THEN
+                RETURN;
+            END IF;
+            FOR p IN 1..{CLUSTER_MAX_PRECISION} LOOP
+                IF p_sign > 0 THEN
+                    INSERT INTO dropoffpointgridcell AS g
+                        (precision, cell, owner_id, count, done_count, latitude_sum, longitude_sum)
+                    VALUES (p, substr(p_geohash, 1, p), p_owner, 1, done, p_lat, p_lon)
+                    ON CONFLICT (precision, cell, owner_id) DO UPDATE SET
+                        count = g.count + 1,
+                        done_count = g.done_count + done,
+                        latitude_sum = g.latitude_sum + p_lat,
+                        longitude_sum = g.longitude_sum + p_lon;
+                ELSE
+                    UPDATE dropoffpointgridcell SET
+                        count = count - 1,
+                        done_count = done_count - done,
+                        latitude_sum = latitude_sum - p_lat,
+                        longitude_sum = longitude_sum - p_lon
+                    WHERE precision = p AND cell = substr(p_geohash, 1, p) AND owner_id = p_owner;
+                END IF;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE FUNCTION dropoffpoint_grid_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM dropoffpoint_grid_apply(OLD.geohash, OLD.owner_id, OLD.latitude, OLD.longitude, OLD.is_done, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM dropoffpoint_grid_apply(NEW.geohash, NEW.owner_id, NEW.latitude, NEW.longitude, NEW.is_done, 1);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER dropoffpoint_grid_insert_delete
+        AFTER INSERT OR DELETE ON dropoffpoint
+        FOR EACH ROW EXECUTE FUNCTION dropoffpoint_grid_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER dropoffpoint_grid_update
+        AFTER UPDATE ON dropoffpoint
+        FOR EACH ROW
+        WHEN (
+            OLD.geohash IS DISTINCT FROM NEW.geohash
+            OR OLD.latitude IS DISTINCT FROM NEW.latitude
+            OR OLD.longitude IS DISTINCT FROM NEW.longitude
+            OR OLD.is_done IS DISTINCT FROM NEW.is_done
+            OR OLD.owner_id IS DISTINCT FROM NEW.owner_id
+        )
+        EXECUTE FUNCTION dropoffpoint_grid_trigger();
+    """)
+    op.execute("LOCK TABLE dropoffpoint IN SHARE MODE")
+    op.execute("DELETE FROM dropoffpointgridcell")
+    op.execute(f"""
+        INSERT INTO dropoffpointgridcell
+            (precision, cell, owner_id, count, done_count, latitude_sum, longitude_sum)
+        SELECT p, substr(geohash, 1, p), owner_id, count(*),
+               count(*) FILTER (WHERE is_done), sum(latitude), sum(longitude)
+        FROM dropoffpoint, generate_series(1, {CLUSTER_MAX_PRECISION}) AS p
+        WHERE geohash IS NOT NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+        GROUP BY p, substr(geohash, 1, p), owner_id
+    """)
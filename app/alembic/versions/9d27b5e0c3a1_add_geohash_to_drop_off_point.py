@@ -0,0 +1,100 @@
+"""add geohash to drop_off_point
+
+Revision ID: 9d27b5e0c3a1
+Revises: 4a8e2c61f0d9
+Create Date: 2026-10-17 12:05:31.774960
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '9d27b5e0c3a1'
+down_revision = '4a8e2c61f0d9'
+branch_labels = None
+depends_on = None
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _geohash_encode(latitude, longitude, precision=9):
+    # Frozen copy of app.core.geo.geohash_encode as of this revision
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            value_range[0] = mid
+        else:
+            bits = bits * 2
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def upgrade():
+    op.add_column('dropoffpoint', sa.Column('geohash', sqlmodel.sql.sqltypes.AutoString(length=12), nullable=True))
+
+    # Backfill existing coordinates in batches
+    connection = op.get_bind()
+    dropoffpoint = sa.table(
+        'dropoffpoint',
+        sa.column('id', sa.Uuid()),
+        sa.column('latitude', sa.Float()),
+        sa.column('longitude', sa.Float()),
+        sa.column('geohash', sa.String()),
+    )
+    update = (
+        sa.update(dropoffpoint)
+        .where(dropoffpoint.c.id == sa.bindparam('point_id'))
+        .values(geohash=sa.bindparam('point_geohash'))
+    )
+    batch_size = 1000
+    last_id = None
+    while True:
+        # Keyset batches, so the table is never held in memory at once
+        select = (
+            sa.select(dropoffpoint.c.id, dropoffpoint.c.latitude, dropoffpoint.c.longitude)
+            .where(dropoffpoint.c.latitude.isnot(None), dropoffpoint.c.longitude.isnot(None))
+            .order_by(dropoffpoint.c.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            select = select.where(dropoffpoint.c.id > last_id)
+        rows = connection.execute(select).all()
+        if not rows:
+            break
+        connection.execute(
+            update,
+            [
+                {'point_id': id, 'point_geohash': _geohash_encode(latitude, longitude)}
+                for id, latitude, longitude in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.create_index(
+        'ix_dropoffpoint_geohash',
+        'dropoffpoint',
+        ['geohash'],
+        unique=False,
+        postgresql_ops={'geohash': 'text_pattern_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_dropoffpoint_geohash', table_name='dropoffpoint')
+    op.drop_column('dropoffpoint', 'geohash')
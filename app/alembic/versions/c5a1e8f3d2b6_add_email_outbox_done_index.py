@@ -0,0 +1,30 @@
+"""add email outbox done index
+
+Revision ID: c5a1e8f3d2b6
+Revises: 8f4c2a6e1d93
+Create Date: 2026-10-18 14:27:53.108436
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a1e8f3d2b6'
+down_revision = '8f4c2a6e1d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_emailoutbox_done_created_at',
+        'emailoutbox',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status <> 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_emailoutbox_done_created_at', table_name='emailoutbox')
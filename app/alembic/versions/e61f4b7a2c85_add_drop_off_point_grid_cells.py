@@ -0,0 +1,130 @@
+"""add drop_off_point grid cells
+
+Revision ID: e61f4b7a2c85
+Revises: 9d27b5e0c3a1
+Create Date: 2026-10-17 13:22:18.091554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e61f4b7a2c85'
+down_revision = '9d27b5e0c3a1'
+branch_labels = None
+depends_on = None
+
+# Must match app.core.geo.CLUSTER_MAX_PRECISION
+CLUSTER_MAX_PRECISION = 7
+
+
+def upgrade():
+    op.create_table('dropoffpointgridcell',
+    sa.Column('precision', sa.Integer(), nullable=False),
+    sa.Column('cell', sqlmodel.sql.sqltypes.AutoString(length=12), nullable=False),
+    sa.Column('owner_id', sa.Uuid(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('done_count', sa.Integer(), nullable=False),
+    sa.Column('latitude_sum', sa.Float(), nullable=False),
+    sa.Column('longitude_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('precision', 'cell', 'owner_id')
+    )
+    op.create_index(
+        'ix_dropoffpointgridcell_precision_cell',
+        'dropoffpointgridcell',
+        ['precision', 'cell'],
+        unique=False,
+        postgresql_ops={'cell': 'text_pattern_ops'},
+    )
+
+    # Incremental maintenance: every change to a point's position, owner or
+    # is_done removes its old contribution and adds the new one. Removals only
+    # UPDATE so cascaded deletes of a user never re-insert rows for it.
+    op.execute(f"""
+        CREATE FUNCTION dropoffpoint_grid_apply(
+            p_geohash text, p_owner uuid, p_lat double precision, p_lon double precision,
+            p_done boolean, p_sign integer
+        ) RETURNS void AS $$
+        DECLARE
+            p integer;
+            done integer := CASE WHEN coalesce(p_done, false) THEN 1 ELSE 0 END;
+        BEGIN
+            IF p_geohash IS NULL OR p_lat IS NULL OR p_lon IS NULL THEN
+                RETURN;
+            END IF;
+            FOR p IN 1..{CLUSTER_MAX_PRECISION} LOOP
+                IF p_sign > 0 THEN
+                    INSERT INTO dropoffpointgridcell AS g
+                        (precision, cell, owner_id, count, done_count, latitude_sum, longitude_sum)
+                    VALUES (p, substr(p_geohash, 1, p), p_owner, 1, done, p_lat, p_lon)
+                    ON CONFLICT (precision, cell, owner_id) DO UPDATE SET
+                        count = g.count + 1,
+                        done_count = g.done_count + done,
+                        latitude_sum = g.latitude_sum + p_lat,
+                        longitude_sum = g.longitude_sum + p_lon;
+                ELSE
+                    UPDATE dropoffpointgridcell SET
+                        count = count - 1,
+                        done_count = done_count - done,
+                        latitude_sum = latitude_sum - p_lat,
+                        longitude_sum = longitude_sum - p_lon
+                    WHERE precision = p AND cell = substr(p_geohash, 1, p) AND owner_id = p_owner;
+                END IF;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE FUNCTION dropoffpoint_grid_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM dropoffpoint_grid_apply(OLD.geohash, OLD.owner_id, OLD.latitude, OLD.longitude, OLD.is_done, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM dropoffpoint_grid_apply(NEW.geohash, NEW.owner_id, NEW.latitude, NEW.longitude, NEW.is_done, 1);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER dropoffpoint_grid_insert_delete
+        AFTER INSERT OR DELETE ON dropoffpoint
+        FOR EACH ROW EXECUTE FUNCTION dropoffpoint_grid_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER dropoffpoint_grid_update
+        AFTER UPDATE ON dropoffpoint
+        FOR EACH ROW
+        WHEN (
+            OLD.geohash IS DISTINCT FROM NEW.geohash
+            OR OLD.latitude IS DISTINCT FROM NEW.latitude
+            OR OLD.longitude IS DISTINCT FROM NEW.longitude
+            OR OLD.is_done IS DISTINCT FROM NEW.is_done
+            OR OLD.owner_id IS DISTINCT FROM NEW.owner_id
+        )
+        EXECUTE FUNCTION dropoffpoint_grid_trigger();
+    """)
+
+    # Backfill the grids from the existing points
+    op.execute(f"""
+        INSERT INTO dropoffpointgridcell
+            (precision, cell, owner_id, count, done_count, latitude_sum, longitude_sum)
+        SELECT p, substr(geohash, 1, p), owner_id, count(*),
+               count(*) FILTER (WHERE is_done), sum(latitude), sum(longitude)
+        FROM dropoffpoint, generate_series(1, {CLUSTER_MAX_PRECISION}) AS p
+        WHERE geohash IS NOT NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+        GROUP BY p, substr(geohash, 1, p), owner_id
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER dropoffpoint_grid_update ON dropoffpoint")
+    op.execute("DROP TRIGGER dropoffpoint_grid_insert_delete ON dropoffpoint")
+    op.execute("DROP FUNCTION dropoffpoint_grid_trigger()")
+    op.execute("DROP FUNCTION dropoffpoint_grid_apply(text, uuid, double precision, double precision, boolean, integer)")
+    op.drop_index('ix_dropoffpointgridcell_precision_cell', table_name='dropoffpointgridcell')
+    op.drop_table('dropoffpointgridcell')
@@ -1,16 +1,21 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.security.utils import get_authorization_scheme_param
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy import exc
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine
+from app.core.principals import principal_cache
+from app.core.replicas import replica_router
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -18,27 +23,58 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_db() -> Generator[Session, None, None]:
+def _token_subject(request: Request) -> str | None:
+    """
+    Subject of the request's bearer token, None when it has no valid one.
+
+    Only keys read-your-writes, the authentication dependencies still check the token.
+    """
+    if not replica_router.replicas:
+        return None
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    except InvalidTokenError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+
+def get_db(request: Request, response: Response) -> Generator[Session, None, None]:
     with Session(engine) as session:
+        # Commits make the client's next reads stick to the primary
+        replica_router.track_writes(session, response, _token_subject(request))
+        yield session
+
+
+async def get_async_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    # Nothing may lazy load on the event loop, so objects stay loaded after commit
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        replica_router.track_writes(session.sync_session, response, _token_subject(request))
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def _decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+
+
+def _check_user(user: User | None) -> User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -46,7 +82,75 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
     return user
 
 
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Session on a read replica for GET handlers that never write.
+
+    Falls back to the primary when no replica is healthy or the client wrote recently.
+    """
+    for replica in replica_router.candidates(request.cookies, _token_subject(request)):
+        session = Session(replica.engine)
+        try:
+            session.connection()
+        except exc.OperationalError:
+            session.close()
+            replica_router.mark_down(replica)
+            continue
+        with session:
+            yield session
+        return
+    with Session(engine) as session:
+        yield session
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    for replica in replica_router.candidates(request.cookies, _token_subject(request)):
+        session = AsyncSession(replica.async_engine, expire_on_commit=False)
+        try:
+            await session.connection()
+        except exc.OperationalError:
+            await session.close()
+            replica_router.mark_down(replica)
+            continue
+        async with session:
+            yield session
+        return
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
+AsyncReadSessionDep = Annotated[AsyncSession, Depends(get_async_read_db)]
+
+
+def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    token_data = _decode_token(token)
+    user = principal_cache.get(session, str(token_data.sub))
+    if not user:
+        user = session.get(User, token_data.sub)
+        if user:
+            principal_cache.set(user)
+    return _check_user(user)
+
+
+async def get_async_current_user(session: AsyncSessionDep, token: TokenDep) -> User:
+    """
+    Same as get_current_user for routes running on the event loop.
+
+    A user served from the principal cache only has the principal columns
+    loaded, async routes must not read any other column from it.
+    """
+    token_data = _decode_token(token)
+    user = await principal_cache.aget(session, str(token_data.sub))
+    if not user:
+        user = await session.get(User, token_data.sub)
+        if user:
+            principal_cache.set(user)
+    return _check_user(user)
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
+AsyncCurrentUser = Annotated[User, Depends(get_async_current_user)]
 
 
 def get_current_active_superuser(current_user: CurrentUser) -> User:
@@ -62,3 +166,7 @@ def get_current_active_organization(current_user: CurrentUser) -> User:
             status_code=403, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_async_current_active_organization(current_user: AsyncCurrentUser) -> User:
+    return get_current_active_organization(current_user)
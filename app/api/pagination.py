@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+import uuid
+from collections.abc import Sequence
+from typing import Any, Literal, cast
+
+from fastapi import HTTPException
+from sqlalchemy import orm
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# "exact" runs a COUNT(*), "estimated" reads the planner's row estimate, "none" skips counting
+CountMode = Literal["exact", "estimated", "none"]
+
+
+def encode_cursor(id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(id.bytes).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(bytes=base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    statement: Any, id_column: Any, *, skip: int, limit: int, cursor: str | None
+) -> Any:
+    """
+    Order a statement by id and apply either keyset (cursor) or offset pagination.
+
+    A cursor takes precedence over skip: the page starts right after the row it
+    points to, so deep pages cost the same as the first one.
+    """
+    statement = statement.order_by(id_column).limit(limit)
+    if cursor is not None:
+        return statement.where(col(id_column) > decode_cursor(cursor))
+    return statement.offset(skip)
+
+
+def next_page_cursor(ids: Sequence[uuid.UUID], limit: int) -> str | None:
+    # A short page is the last one
+    if not ids or len(ids) < limit:
+        return None
+    return encode_cursor(ids[-1])
+
+
+def count_rows(session: Session, statement: Any, count_mode: CountMode) -> int | None:
+    """
+    Count the rows matched by an unpaginated statement according to count_mode.
+    """
+    if count_mode == "none":
+        return None
+    if count_mode == "estimated":
+        return _estimate_rows(session, statement)
+    count_statement = select(func.count()).select_from(statement.order_by(None).subquery())
+    return session.exec(count_statement).one()
+
+
+async def acount_rows(session: AsyncSession, statement: Any, count_mode: CountMode) -> int | None:
+    def count(sync_session: orm.Session) -> int | None:
+        # sqlmodel's AsyncSession wraps a sqlmodel Session
+        return count_rows(cast(Session, sync_session), statement, count_mode)
+
+    return await session.run_sync(count)
+
+
+def _estimate_rows(session: Session, statement: Any) -> int:
+    connection = session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -1,10 +1,30 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 
-from app.models import AddressResponse
+from app.api.deps import get_current_active_superuser
+from app.core.addok import AddokError
+from app.core.geocoding import geocoding_cache
+from app.models import AddressResponse, GeocodingCacheStats
 from app.utils import address_search
 
 router = APIRouter(prefix="/address", tags=["address"])
 
 @router.get("/search", response_model=AddressResponse)
-def search_address(query: str):
-    return address_search(query)
+async def search_address(query: str):
+    try:
+        return await address_search(query)
+    except AddokError as e:
+        if e.status_code is not None and 400 <= e.status_code < 500:
+            raise HTTPException(status_code=400, detail="Invalid address query")
+        raise HTTPException(status_code=502, detail="Address search unavailable")
+
+
+@router.get(
+    "/cache-stats",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=GeocodingCacheStats,
+)
+def read_cache_stats() -> GeocodingCacheStats:
+    """
+    Geocoding cache hit/miss counters for the worker serving the request.
+    """
+    return geocoding_cache.stats()
@@ -1,12 +1,60 @@
+import csv
+import io
+import math
 import uuid
-from typing import Any
+from collections.abc import Iterator
+from typing import Any, Literal
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import BigInteger, Float, Select, cast
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, case, col, func, or_, select, union_all, update
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import CurrentUser, SessionDep
-from app.models import DropOffPoint, DropOffPointCreate, DropOffPointPublic, DropOffPointsPublic, DropOffPointUpdate, MemberOf, Message
-from app.utils import address_search
+from app import crud
+from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncReadSessionDep,
+    CurrentUser,
+    SessionDep,
+)
+from app.api.pagination import CountMode, acount_rows, next_page_cursor, paginate
+from app.core.config import settings
+from app.core.db import engine
+from app.core.geo import (
+    EARTH_RADIUS_METERS,
+    GRID_COORDINATE_SCALE,
+    bounding_box,
+    covering_geohashes,
+    geohash_for,
+    zoom_to_precision,
+)
+from app.core.geocoding_worker import geocoding_worker
+from app.core.query_inspector import query_budget
+from app.models import (
+    DONE_FORBIDDEN,
+    DONE_NOT_FOUND,
+    DONE_UPDATED,
+    GEOCODE_PENDING,
+    GEOCODE_SKIPPED,
+    DropOffPoint,
+    DropOffPointCluster,
+    DropOffPointClustersPublic,
+    DropOffPointCreate,
+    DropOffPointDoneResult,
+    DropOffPointDoneResults,
+    DropOffPointGridCell,
+    DropOffPointPublic,
+    DropOffPointsDoneUpdate,
+    DropOffPointsPublic,
+    DropOffPointUpdate,
+    MemberOf,
+    Message,
+    User,
+)
+from app.utils import geocode_many
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,70 +62,298 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/drop-off-points", tags=["drop-off-points"])
 
 
-@router.get("/", response_model=DropOffPointsPublic)
-def read_drop_off_points(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100, use_pagination: bool = True
+def _select_public_drop_off_points() -> Any:
+    """
+    Select the DropOffPointPublic columns, with the owner name joined in the same query.
+    """
+    return select(*[
+        col(DropOffPoint.id),
+        col(DropOffPoint.title),
+        col(DropOffPoint.description),
+        col(DropOffPoint.address),
+        col(DropOffPoint.owner_id),
+        col(User.full_name).label("owner_full_name"),
+        col(DropOffPoint.latitude),
+        col(DropOffPoint.longitude),
+        col(DropOffPoint.responsible_id),
+        col(DropOffPoint.is_done),
+        col(DropOffPoint.geocode_status),
+    ]).join(User, col(DropOffPoint.owner_id) == User.id)
+
+
+def _visible_to(current_user: User) -> Any:
+    """
+    Filter on the drop-off points a user may read, None for superusers who see everything.
+    """
+    if current_user.is_superuser:
+        return None
+    # Owned OR responsible as an accepted member, written as a UNION ALL of two
+    # index lookups: an OR across both paths makes Postgres scan the whole table
+    owned = aliased(DropOffPoint)
+    responsible = aliased(DropOffPoint)
+    return col(DropOffPoint.id).in_(
+        union_all(
+            select(owned.id).where(owned.owner_id == current_user.id),
+            select(responsible.id)
+            .join(MemberOf, col(responsible.responsible_id) == MemberOf.id)
+            .where(
+                MemberOf.member_id == current_user.id,
+                MemberOf.is_pending == False
+            ),
+        )
+    )
+
+
+def _distance_to(latitude: float, longitude: float) -> Any:
+    """
+    Great-circle distance in meters from a location to each drop off point, as app.core.geo.haversine_distance.
+    """
+    d_phi = func.radians(col(DropOffPoint.latitude) - latitude) / 2
+    d_lambda = func.radians(col(DropOffPoint.longitude) - longitude) / 2
+    a = func.power(func.sin(d_phi), 2) + math.cos(math.radians(latitude)) * func.cos(
+        func.radians(DropOffPoint.latitude)
+    ) * func.power(func.sin(d_lambda), 2)
+    # Rounding can push sqrt(a) a hair above 1, out of asin's domain
+    return 2 * EARTH_RADIUS_METERS * func.asin(func.least(func.sqrt(a), 1.0))
+
+
+def _select_in_bbox(
+    current_user: User, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+) -> Any:
+    # The geohash prefixes hit the index, the exact bounds trim the covering cells
+    cells = covering_geohashes(min_lat, min_lon, max_lat, max_lon)
+    statement = _select_public_drop_off_points().where(
+        or_(*[col(DropOffPoint.geohash).like(f"{cell}%") for cell in cells]),
+        col(DropOffPoint.latitude).between(min_lat, max_lat),
+        col(DropOffPoint.longitude).between(min_lon, max_lon),
+    )
+    visible = _visible_to(current_user)
+    if visible is not None:
+        statement = statement.where(visible)
+    return statement
+
+
+@router.get("/", dependencies=[query_budget(3)], response_model=DropOffPointsPublic)
+async def read_drop_off_points(
+    session: AsyncReadSessionDep,
+    current_user: AsyncCurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    use_pagination: bool = True,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
 ) -> Any:
     """
     Retrieve drop off points.
+
+    Pass the returned next_cursor as cursor to fetch the following page without an OFFSET scan.
+    """
+    statement = _select_public_drop_off_points()
+    count_statement = select(DropOffPoint.id)
+    visible = _visible_to(current_user)
+    if visible is not None:
+        statement = statement.where(visible)
+        count_statement = count_statement.where(visible)
+    count = await acount_rows(session, count_statement, count_mode)
+
+    paginated = use_pagination or current_user.is_superuser
+    if paginated:
+        statement = paginate(statement, DropOffPoint.id, skip=skip, limit=limit, cursor=cursor)
+
+    public_drop_off_points = [
+        DropOffPointPublic.model_validate(dict(row._mapping))
+        for row in (await session.exec(statement)).all()
+    ]
+    next_cursor = (
+        next_page_cursor([p.id for p in public_drop_off_points], limit) if paginated else None
+    )
+    return DropOffPointsPublic(data=public_drop_off_points, count=count, next_cursor=next_cursor)
+
+
+@router.get("/nearby", response_model=DropOffPointsPublic)
+def read_nearby_drop_off_points(
+    session: SessionDep,
+    current_user: CurrentUser,
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float = Query(default=1000, gt=0, le=50_000, description="Radius in meters"),
+    limit: int = Query(default=100, gt=0, le=1000),
+) -> Any:
+    """
+    Retrieve the drop off points within radius meters of a location, nearest first.
+    """
+    # Distance filter, ordering and limit all run in Postgres, only the page is fetched;
+    # the window count is taken over every point in the radius before the LIMIT
+    in_bbox = (
+        _select_in_bbox(current_user, *bounding_box(lat, lon, radius))
+        .add_columns(_distance_to(lat, lon).label("distance"))
+        .subquery()
+    )
+    statement = (
+        select(in_bbox, func.count().over().label("total"))
+        .where(in_bbox.c.distance <= radius)
+        .order_by(in_bbox.c.distance, in_bbox.c.id)
+        .limit(limit)
+    )
+    rows = session.execute(statement).all()
+    data = [DropOffPointPublic.model_validate(dict(row._mapping)) for row in rows]
+    return DropOffPointsPublic(data=data, count=rows[0].total if rows else 0)
+
+
+@router.get("/bbox", response_model=DropOffPointsPublic)
+def read_drop_off_points_in_bbox(
+    session: SessionDep,
+    current_user: CurrentUser,
+    min_lat: float = Query(ge=-90, le=90),
+    min_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+    limit: int = Query(default=1000, gt=0, le=5000),
+) -> Any:
+    """
+    Retrieve the drop off points inside a bounding box.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    statement = _select_in_bbox(current_user, min_lat, min_lon, max_lat, max_lon).limit(limit)
+    data = [
+        DropOffPointPublic.model_validate(dict(row._mapping))
+        for row in session.exec(statement).all()
+    ]
+    return DropOffPointsPublic(data=data, count=len(data))
+
+
+@router.get("/clusters", response_model=DropOffPointClustersPublic)
+def read_drop_off_point_clusters(
+    session: SessionDep,
+    current_user: CurrentUser,
+    zoom: int = Query(ge=0, le=22),
+    min_lat: float = Query(ge=-90, le=90),
+    min_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+) -> Any:
     """
+    Retrieve drop off point clusters for a map view: centroid, count and done count per grid cell.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    precision = zoom_to_precision(zoom)
+    prefixes = {cell[:precision] for cell in covering_geohashes(min_lat, min_lon, max_lat, max_lon)}
+
+    # Precomputed per-owner aggregates cover every point a superuser sees and a user's own points
+    grid_cells: Select[Any] = select(*[
+        col(DropOffPointGridCell.cell).label("cell"),
+        col(DropOffPointGridCell.count).label("count"),
+        col(DropOffPointGridCell.done_count).label("done_count"),
+        col(DropOffPointGridCell.latitude_e7_sum).label("latitude_e7_sum"),
+        col(DropOffPointGridCell.longitude_e7_sum).label("longitude_e7_sum"),
+    ]).where(
+        col(DropOffPointGridCell.precision) == precision,
+        or_(*[col(DropOffPointGridCell.cell).like(f"{prefix}%") for prefix in prefixes]),
+    )
     if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(DropOffPoint)
-        count = session.exec(count_statement).one()
-        statement = select(DropOffPoint).offset(skip).limit(limit)
-        drop_off_points = session.exec(statement).all()
+        cells = grid_cells.subquery()
     else:
-        # Get drop-off points where user is owner OR responsible through MemberOf
-        count_statement = (
-            select(func.count())
-            .select_from(DropOffPoint)
-            .where(
-                (DropOffPoint.owner_id == current_user.id) |
-                (DropOffPoint.responsible_id.in_(
-                    select(MemberOf.id)
-                    .where(
-                        MemberOf.member_id == current_user.id,
-                        MemberOf.is_pending == False
-                    )
-                ))
-            )
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(DropOffPoint)
-            .where(
-                (DropOffPoint.owner_id == current_user.id) |
-                (DropOffPoint.responsible_id.in_(
-                    select(MemberOf.id)
-                    .where(
-                        MemberOf.member_id == current_user.id,
-                        MemberOf.is_pending == False
-                    )
-                ))
-            )
+        # Points the user is responsible for belong to other owners, aggregate them on the fly
+        # with the same integer coordinates as the grid
+        cell = func.substr(DropOffPoint.geohash, 1, precision)
+        responsible_cells = select(*[
+            cell.label("cell"),
+            func.count().label("count"),
+            func.sum(case((col(DropOffPoint.is_done).is_(True), 1), else_=0)).label("done_count"),
+            func.sum(cast(func.round(col(DropOffPoint.latitude) * GRID_COORDINATE_SCALE), BigInteger)).label(
+                "latitude_e7_sum"
+            ),
+            func.sum(cast(func.round(col(DropOffPoint.longitude) * GRID_COORDINATE_SCALE), BigInteger)).label(
+                "longitude_e7_sum"
+            ),
+        ]).where(
+            _visible_to(current_user),
+            col(DropOffPoint.owner_id) != current_user.id,
+            or_(*[col(DropOffPoint.geohash).like(f"{prefix}%") for prefix in prefixes]),
+        ).group_by(cell)
+        cells = union_all(
+            grid_cells.where(col(DropOffPointGridCell.owner_id) == current_user.id), responsible_cells
+        ).subquery()
+
+    # The covering prefixes reach outside the view, only cells whose centroid is inside it are
+    # kept, and a view that is too large for its zoom is cut to its largest clusters
+    count = func.sum(cells.c.count)
+    latitude_e7_sum = func.sum(cells.c.latitude_e7_sum)
+    longitude_e7_sum = func.sum(cells.c.longitude_e7_sum)
+    statement = (
+        select(*[
+            cells.c.cell,
+            count,
+            func.sum(cells.c.done_count),
+            cast(latitude_e7_sum, Float) / GRID_COORDINATE_SCALE,
+            cast(longitude_e7_sum, Float) / GRID_COORDINATE_SCALE,
+        ])
+        .group_by(cells.c.cell)
+        .having(
+            count > 0,
+            latitude_e7_sum.between(min_lat * GRID_COORDINATE_SCALE * count, max_lat * GRID_COORDINATE_SCALE * count),
+            longitude_e7_sum.between(min_lon * GRID_COORDINATE_SCALE * count, max_lon * GRID_COORDINATE_SCALE * count),
         )
-        if use_pagination:
-            statement = statement.offset(skip).limit(limit)
-        drop_off_points = session.exec(statement).all()
-
-    # Convert to DropOffPointPublic with owner_full_name
-    public_drop_off_points = []
-    for drop_off_point in drop_off_points:
-        public_point = DropOffPointPublic(
-            id=drop_off_point.id,
-            title=drop_off_point.title,
-            description=drop_off_point.description,
-            address=drop_off_point.address,
-            owner_id=drop_off_point.owner_id,
-            owner_full_name=drop_off_point.owner.full_name if drop_off_point.owner else None,
-            latitude=drop_off_point.latitude,
-            longitude=drop_off_point.longitude,
-            responsible_id=drop_off_point.responsible_id,
-            is_done=drop_off_point.is_done
+        .order_by(count.desc(), cells.c.cell)
+        .limit(settings.DROP_OFF_POINT_CLUSTERS_MAX)
+    )
+    clusters = [
+        DropOffPointCluster(
+            geohash=geohash,
+            latitude=latitude_sum / count,
+            longitude=longitude_sum / count,
+            count=int(count),
+            done_count=int(done_count),
         )
-        public_drop_off_points.append(public_point)
+        for geohash, count, done_count, latitude_sum, longitude_sum in sorted(session.execute(statement).all())
+    ]
+    return DropOffPointClustersPublic(data=clusters, count=len(clusters))
+
+
+def _stream_drop_off_points(current_user: User, format: Literal["ndjson", "csv"]) -> Iterator[str]:
+    statement = _select_public_drop_off_points().order_by(DropOffPoint.id)
+    visible = _visible_to(current_user)
+    if visible is not None:
+        statement = statement.where(visible)
+    statement = statement.execution_options(yield_per=settings.DROP_OFF_POINTS_EXPORT_BATCH_SIZE)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv":
+        writer.writerow(DropOffPointPublic.model_fields)
+        yield buffer.getvalue()
+    # The request session may be closed before the body is sent, the stream owns its own
+    with Session(engine) as session:
+        for partition in session.exec(statement).partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in partition:
+                drop_off_point = DropOffPointPublic.model_validate(dict(row._mapping))
+                if format == "csv":
+                    writer.writerow(drop_off_point.model_dump(mode="json").values())
+                else:
+                    buffer.write(drop_off_point.model_dump_json())
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+
+@router.get("/export")
+def export_drop_off_points(
+    current_user: CurrentUser, format: Literal["ndjson", "csv"] = "ndjson"
+) -> StreamingResponse:
+    """
+    Export every visible drop off point as NDJSON or CSV.
 
-    return DropOffPointsPublic(data=public_drop_off_points, count=count)
+    Rows are streamed from a server-side cursor, so memory stays flat whatever the number of points.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_drop_off_points(current_user, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="drop-off-points.{format}"'},
+    )
 
 
 @router.get("/{id}", response_model=DropOffPointPublic)
@@ -85,9 +361,12 @@ def read_drop_off_point(session: SessionDep, current_user: CurrentUser, id: uuid
     """
     Get drop off point by ID.
     """
-    drop_off_point = session.get(DropOffPoint, id)
-    if not drop_off_point:
+    row = session.exec(
+        _select_public_drop_off_points().where(DropOffPoint.id == id)
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Drop off point not found")
+    drop_off_point = DropOffPointPublic.model_validate(dict(row._mapping))
 
     is_responsible = False
     if drop_off_point.responsible_id:
@@ -102,19 +381,21 @@ def read_drop_off_point(session: SessionDep, current_user: CurrentUser, id: uuid
 
     if not current_user.is_superuser and (drop_off_point.owner_id != current_user.id) and (not is_responsible):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    
-    return DropOffPointPublic(
-        id=drop_off_point.id,
-        title=drop_off_point.title,
-        description=drop_off_point.description,
-        address=drop_off_point.address,
-        owner_id=drop_off_point.owner_id,
-        owner_full_name=drop_off_point.owner.full_name if drop_off_point.owner else None,
-        latitude=drop_off_point.latitude,
-        longitude=drop_off_point.longitude,
-        responsible_id=drop_off_point.responsible_id,
-        is_done=drop_off_point.is_done
-    )
+
+    return drop_off_point
+
+
+def _check_responsible(session: Session, current_user: User, responsible_id: uuid.UUID) -> None:
+    member = session.exec(
+        select(MemberOf).where(
+            MemberOf.organization_id == current_user.id,
+            MemberOf.id == responsible_id,
+            MemberOf.is_pending == False
+        )
+    ).first()
+
+    if not member:
+        raise HTTPException(status_code=404, detail="Member not found in organization")
 
 
 @router.post("/", response_model=DropOffPointPublic)
@@ -123,38 +404,21 @@ def create_drop_off_point(
 ) -> Any:
     """
     Create new drop off point.
+
+    The point is stored right away, its coordinates are filled in by the geocoding worker.
     """
-    longitude, latitude = None, None
-    try:
-        if drop_off_point_in.address:
-            coordinates = address_search(drop_off_point_in.address).features[0].geometry.coordinates
-            longitude, latitude = coordinates
-            drop_off_point_in.longitude = longitude
-            drop_off_point_in.latitude = latitude
-        else:
-            drop_off_point_in.longitude = None
-            drop_off_point_in.latitude = None
-            
-    except Exception as e:
-        logger.error(f"Error creating drop off point: {e}")
-    member = None
     if current_user.is_organization:
         if drop_off_point_in.responsible_id:
-            member = session.exec(
-                select(MemberOf).where(
-                    MemberOf.organization_id == current_user.id,
-                    MemberOf.id == drop_off_point_in.responsible_id,
-                    MemberOf.is_pending == False
-                )
-            ).first()
-            
-            if not member:
-                raise HTTPException(status_code=404, detail="Member not found in organization")
-
-    drop_off_point = DropOffPoint.model_validate(drop_off_point_in, update={"owner_id": current_user.id})
-    session.add(drop_off_point)
-    session.commit()
-    session.refresh(drop_off_point)
+            _check_responsible(session, current_user, drop_off_point_in.responsible_id)
+
+    if not drop_off_point_in.address:
+        drop_off_point_in.longitude = None
+        drop_off_point_in.latitude = None
+
+    drop_off_point = crud.create_drop_off_point(
+        session=session, drop_off_point_in=drop_off_point_in, owner_id=current_user.id
+    )
+    geocoding_worker.wake()
     return DropOffPointPublic(
         id=drop_off_point.id,
         title=drop_off_point.title,
@@ -164,8 +428,97 @@ def create_drop_off_point(
         owner_full_name=current_user.full_name,
         latitude=drop_off_point.latitude,
         longitude=drop_off_point.longitude,
-        responsible_id=drop_off_point.responsible_id
+        responsible_id=drop_off_point.responsible_id,
+        geocode_status=drop_off_point.geocode_status
+    )
+
+
+def _insert_drop_off_points(
+    session: Session, current_user: User, drop_off_points_in: list[DropOffPointCreate]
+) -> DropOffPointsPublic:
+    responsible_ids = {p.responsible_id for p in drop_off_points_in if p.responsible_id}
+    if current_user.is_organization and responsible_ids:
+        found_ids = session.exec(
+            select(MemberOf.id).where(
+                MemberOf.organization_id == current_user.id,
+                col(MemberOf.id).in_(responsible_ids),
+                MemberOf.is_pending == False
+            )
+        ).all()
+        if set(found_ids) != responsible_ids:
+            raise HTTPException(status_code=404, detail="Member not found in organization")
+
+    drop_off_points = crud.create_drop_off_points(
+        session=session, drop_off_points_in=drop_off_points_in, owner_id=current_user.id
     )
+    geocoding_worker.wake()
+    public_drop_off_points = [
+        DropOffPointPublic.model_validate(drop_off_point, update={"owner_full_name": current_user.full_name})
+        for drop_off_point in drop_off_points
+    ]
+    return DropOffPointsPublic(data=public_drop_off_points, count=len(public_drop_off_points))
+
+
+async def _bulk_create_drop_off_points(
+    session: Session, current_user: User, drop_off_points_in: list[DropOffPointCreate]
+) -> DropOffPointsPublic:
+    if len(drop_off_points_in) > settings.DROP_OFF_POINTS_BULK_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot import more than {settings.DROP_OFF_POINTS_BULK_MAX} drop off points at once",
+        )
+    coordinates = await geocode_many([p.address for p in drop_off_points_in if p.address])
+    for drop_off_point_in in drop_off_points_in:
+        if drop_off_point_in.address:
+            drop_off_point_in.longitude, drop_off_point_in.latitude = (
+                coordinates.get(drop_off_point_in.address)
+                or (drop_off_point_in.longitude, drop_off_point_in.latitude)
+            )
+        else:
+            drop_off_point_in.longitude = None
+            drop_off_point_in.latitude = None
+
+    return await run_in_threadpool(_insert_drop_off_points, session, current_user, drop_off_points_in)
+
+
+@router.post("/bulk", response_model=DropOffPointsPublic)
+async def create_drop_off_points(
+    *, session: SessionDep, current_user: CurrentUser, drop_off_points_in: list[DropOffPointCreate]
+) -> Any:
+    """
+    Create many drop off points at once, geocoding all addresses in batches.
+    """
+    return await _bulk_create_drop_off_points(session, current_user, drop_off_points_in)
+
+
+@router.post("/bulk/csv", response_model=DropOffPointsPublic)
+async def import_drop_off_points_csv(
+    *, session: SessionDep, current_user: CurrentUser, file: UploadFile
+) -> Any:
+    """
+    Import drop off points from a CSV file with a header row.
+
+    Recognized columns are title, description, address, responsible_id and is_done.
+    """
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8 encoded")
+
+    drop_off_points_in = []
+    # Line 1 is the header
+    for line_number, row in enumerate(csv.DictReader(io.StringIO(content)), start=2):
+        # Empty cells fall back to the model defaults
+        values = {key: value for key, value in row.items() if key and value}
+        try:
+            drop_off_points_in.append(DropOffPointCreate.model_validate(values))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid row on line {line_number}: {e.errors(include_url=False)}",
+            )
+
+    return await _bulk_create_drop_off_points(session, current_user, drop_off_points_in)
 
 
 @router.put("/{id}", response_model=DropOffPointPublic)
@@ -185,41 +538,28 @@ def update_drop_off_point(
     if not current_user.is_superuser and (drop_off_point.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
     update_dict = drop_off_point_in.model_dump(exclude_unset=True)
-    longitude, latitude = None, None
-    try:
-        if drop_off_point.address:
-            address_search_result = address_search(drop_off_point_in.address).features[0]
-            coordinates = address_search_result.geometry.coordinates
-            longitude, latitude = coordinates
-            update_dict["latitude"] = latitude
-            update_dict["longitude"] = longitude
-        else:
-            update_dict["latitude"] = None
-            update_dict["longitude"] = None
-    except Exception as e:
-        logger.error(f"Error updating drop off point: {e}")
-    
-    member = None
+    address_changed = "address" in update_dict and update_dict["address"] != drop_off_point.address
+    if address_changed:
+        # Stale coordinates are dropped and the new address is queued for geocoding
+        update_dict["latitude"] = None
+        update_dict["longitude"] = None
+        update_dict["geocode_status"] = GEOCODE_PENDING if update_dict["address"] else GEOCODE_SKIPPED
+        update_dict["geocode_attempts"] = 0
+        update_dict["geocode_next_attempt_at"] = None
 
     if current_user.is_organization:
-        if update_dict["responsible_id"]:
-            member = session.exec(
-                select(MemberOf).where(
-                    MemberOf.organization_id == current_user.id,
-                    MemberOf.id == update_dict["responsible_id"],
-                    MemberOf.is_pending == False
-                )
-            ).first()
-            
-            if not member:
-                raise HTTPException(status_code=404, detail="Member not found in organization")
+        if update_dict.get("responsible_id"):
+            _check_responsible(session, current_user, update_dict["responsible_id"])
         else:
             update_dict["responsible_id"] = None
 
     drop_off_point.sqlmodel_update(update_dict)
+    drop_off_point.geohash = geohash_for(drop_off_point.latitude, drop_off_point.longitude)
     session.add(drop_off_point)
     session.commit()
     session.refresh(drop_off_point)
+    if address_changed:
+        geocoding_worker.wake()
     return DropOffPointPublic(
         id=drop_off_point.id,
         title=drop_off_point.title,
@@ -229,7 +569,8 @@ def update_drop_off_point(
         owner_full_name=drop_off_point.owner.full_name if drop_off_point.owner else None,
         latitude=drop_off_point.latitude,
         longitude=drop_off_point.longitude,
-        responsible_id=drop_off_point.responsible_id
+        responsible_id=drop_off_point.responsible_id,
+        geocode_status=drop_off_point.geocode_status
     )
 
 @router.delete("/{id}")
@@ -279,3 +620,56 @@ def set_drop_off_point_done(
     session.commit()
     session.refresh(drop_off_point)
     return Message(message=f"Drop off point set {'done' if is_done else 'not done'}")
+
+
+@router.post("/done", dependencies=[query_budget(3)], response_model=DropOffPointDoneResults)
+def set_drop_off_points_done(
+    session: SessionDep, current_user: CurrentUser, done_in: DropOffPointsDoneUpdate
+) -> Any:
+    """
+    Set many drop off points as done or not done, with one result per id.
+
+    Points that do not exist or that the user may not change are reported instead of failing the whole request.
+    """
+    # Duplicates are answered once, in the order they were first given
+    ids = list(dict.fromkeys(done_in.ids))
+    if len(ids) > settings.DROP_OFF_POINTS_BULK_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot update more than {settings.DROP_OFF_POINTS_BULK_MAX} drop off points at once",
+        )
+    # Same rule as set_drop_off_point_done: owner, accepted responsible or superuser
+    allowed = case(
+        (col(DropOffPoint.owner_id) == current_user.id, True),
+        (col(MemberOf.id).is_not(None), True),
+        else_=current_user.is_superuser,
+    )
+    permissions = dict(
+        session.exec(
+            select(DropOffPoint.id, allowed)
+            .outerjoin(
+                MemberOf,
+                (col(MemberOf.id) == DropOffPoint.responsible_id)
+                & (MemberOf.member_id == current_user.id)
+                & (MemberOf.is_pending == False),
+            )
+            .where(col(DropOffPoint.id).in_(ids))
+        ).all()
+    )
+    updated_ids = [id for id in ids if permissions.get(id)]
+    if updated_ids:
+        session.execute(
+            update(DropOffPoint)
+            .where(col(DropOffPoint.id).in_(updated_ids))
+            .values(is_done=done_in.is_done)
+        )
+        session.commit()
+
+    results = [
+        DropOffPointDoneResult(
+            id=id,
+            status=DONE_NOT_FOUND if id not in permissions else DONE_UPDATED if permissions[id] else DONE_FORBIDDEN,
+        )
+        for id in ids
+    ]
+    return DropOffPointDoneResults(data=results, count=len(results))
@@ -1,14 +1,24 @@
 from datetime import timedelta
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncSessionDep,
+    SessionDep,
+    get_current_active_superuser,
+)
 from app.core import security
 from app.core.config import settings
+from app.core.rate_limit import (
+    login_account_limiter,
+    login_account_total_limiter,
+    login_ip_limiter,
+)
 from app.core.security import get_password_hash
 from app.models import Message, NewPassword, Token, UserPublic
 from app.utils import (
@@ -21,20 +31,53 @@ from app.utils import (
 router = APIRouter(tags=["login"])
 
 
+def _client_ip(request: Request) -> str:
+    if settings.CLIENT_IP_HEADER:
+        forwarded = request.headers.get(settings.CLIENT_IP_HEADER)
+        if forwarded:
+            # Proxies append the address they received the request from
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
 @router.post("/login/access-token")
-def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+async def login_access_token(
+    request: Request,
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.authenticate(
+    # Throttled attempts are refused before any password hashing happens.
+    # Accounts are throttled per client IP, so failed attempts from elsewhere
+    # lock their owner out only once the higher limit over every IP is
+    # reached, and that one still stops attempts spread across many IPs.
+    # Each limit is only charged for attempts the previous ones let through.
+    client_ip = _client_ip(request)
+    username = form_data.username.strip().lower()
+    account_key = f"login:account:{username}:{client_ip}"
+    account_total_key = f"login:account:{username}"
+    retry_after = login_ip_limiter.hit(f"login:ip:{client_ip}")
+    if not retry_after:
+        retry_after = login_account_limiter.hit(account_key)
+    if not retry_after:
+        retry_after = login_account_total_limiter.hit(account_total_key)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    user = await crud.aauthenticate(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    login_account_limiter.reset(account_key)
+    login_account_total_limiter.reset(account_total_key)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(
         access_token=security.create_access_token(
@@ -44,7 +87,7 @@ def login_access_token(
 
 
 @router.post("/login/test-token", response_model=UserPublic)
-def test_token(current_user: CurrentUser) -> Any:
+async def test_token(current_user: AsyncCurrentUser) -> Any:
     """
     Test access token
     """
@@ -68,6 +111,7 @@ def recover_password(email: str, session: SessionDep) -> Message:
         email_to=user.email, email=email, token=password_reset_token
     )
     send_email(
+        session=session,
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
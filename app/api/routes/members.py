@@ -2,29 +2,40 @@ from typing import Any
 import uuid
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
+from app import crud
 from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncSessionDep,
     CurrentUser,
     SessionDep,
 )
-from app.models import DropOffPoint, MemberOf, OrganizationMembershipsResponse, OrganizationMembershipResponse
+from app.core.query_inspector import query_budget
+from app.models import MemberOf, OrganizationMembershipsResponse, OrganizationMembershipResponse
 
 router = APIRouter(prefix="/members", tags=["members"])
 
 # As Member
-@router.get("/organizations", response_model=OrganizationMembershipsResponse)
-def get_organizations(
-    session: SessionDep,
-    current_user: CurrentUser
+@router.get(
+    "/organizations",
+    dependencies=[query_budget(2)],
+    response_model=OrganizationMembershipsResponse,
+)
+async def get_organizations(
+    session: AsyncSessionDep,
+    current_user: AsyncCurrentUser
 ) -> Any:
     """
     Get all organizations the current user is a member of.
     """
-    organizations = session.exec(
-        select(MemberOf).where(
+    organizations = (await session.exec(
+        select(MemberOf)
+        .options(joinedload(MemberOf.organization))
+        .where(
             MemberOf.member_id == current_user.id,
         )
-    ).all()
+    )).all()
     
     response_data = []
     for membership in organizations:
@@ -69,7 +80,7 @@ def accept_invitation(
 
     return True
 
-@router.delete("/{member_id}", response_model=bool)
+@router.delete("/{member_id}", dependencies=[query_budget(4)], response_model=bool)
 def delete_organization(
     member_id: uuid.UUID,
     session: SessionDep,
@@ -87,19 +98,5 @@ def delete_organization(
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
     
-    member = member[0]
-
-    drop_off_points = session.exec(
-        select(DropOffPoint).where(
-            DropOffPoint.responsible_id == member.id
-        )
-    ).all()
-
-    for drop_off_point in drop_off_points:
-        drop_off_point = drop_off_point[0]
-        drop_off_point.responsible_id = None
-        session.add(drop_off_point)
-
-    session.delete(member)
-    session.commit()
+    crud.delete_membership(session=session, membership_id=member[0].id)
     return True
\ No newline at end of file
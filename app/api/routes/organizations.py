@@ -2,15 +2,34 @@ from typing import Any
 import uuid
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import joinedload
+from sqlmodel import col
 
 from app import crud
 from app.api.deps import (
+    AsyncCurrentUser,
+    AsyncReadSessionDep,
     CurrentUser,
     SessionDep,
+    get_async_current_active_organization,
     get_current_active_organization,
 )
-from app.models import DropOffPoint, MemberOf, MembersResponse, MemberInfo
+from app.api.pagination import CountMode, acount_rows, next_page_cursor, paginate
+from app.core.config import settings
+from app.core.query_inspector import query_budget
+from app.models import (
+    INVITATION_ALREADY_MEMBER,
+    INVITATION_INVITED,
+    INVITATION_USER_NOT_FOUND,
+    InvitationResult,
+    InvitationResults,
+    MemberOf,
+    MembersResponse,
+    MemberInfo,
+    ReassignmentResponse,
+    User,
+)
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -26,45 +45,131 @@ def invite_user_to_organization(
     user = crud.get_user_by_email(session=session, email=email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    is_existing_member = session.exec(
-        select(MemberOf).where(
-            MemberOf.organization_id == current_user.id,
-            MemberOf.member_id == user.id
-        )
-    ).first()
-    
-    if is_existing_member:
-        raise HTTPException(status_code=400, detail="User already a member of the organization")
 
-    member_of = MemberOf(organization_id=current_user.id, member_id=user.id, is_pending=True)
-    session.add(member_of)
+    # Existing members conflict, including one just inserted by a concurrent invite
+    membership_id = session.execute(
+        insert(MemberOf)
+        .values(id=uuid.uuid4(), organization_id=current_user.id, member_id=user.id, is_pending=True)
+        .on_conflict_do_nothing(index_elements=["organization_id", "member_id"])
+        .returning(col(MemberOf.id))
+    ).scalar_one_or_none()
+    if membership_id is None:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="User already a member of the organization")
     session.commit()
-    session.refresh(member_of)
 
+    return _member_info(membership_id, user, True)
+
+def _member_info(membership_id: uuid.UUID, user: User, is_pending: bool) -> MemberInfo:
     return MemberInfo(
-        id=member_of.id,
-        email=member_of.member.email,
-        is_active=member_of.member.is_active,
-        is_superuser=member_of.member.is_superuser,
-        is_organization=member_of.member.is_organization,
-        full_name=member_of.member.full_name,
-        is_pending=member_of.is_pending
+        id=membership_id,
+        email=user.email,
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+        is_organization=user.is_organization,
+        full_name=user.full_name,
+        is_pending=is_pending
     )
 
-@router.get("/members", dependencies=[Depends(get_current_active_organization)], response_model=MembersResponse)
-def get_members(
+@router.post(
+    "/invite/bulk",
+    dependencies=[Depends(get_current_active_organization), query_budget(4)],
+    response_model=InvitationResults,
+)
+def invite_users_to_organization(
+    emails: list[str],
     session: SessionDep,
     current_user: CurrentUser
+) -> Any:
+    """
+    Send invitations to many users at once, with one result per email.
+
+    Unknown emails and existing members are reported instead of failing the whole request.
+    """
+    # Duplicates are answered once, in the order they were first given
+    emails = list(dict.fromkeys(emails))
+    if len(emails) > settings.ORGANIZATION_INVITES_BULK_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot invite more than {settings.ORGANIZATION_INVITES_BULK_MAX} users at once",
+        )
+    users = {
+        user.email: user
+        for user in session.execute(select(User).where(col(User.email).in_(emails))).scalars()
+    }
+    memberships = {
+        membership.member_id: membership
+        for membership in session.execute(
+            select(MemberOf).where(
+                col(MemberOf.organization_id) == current_user.id,
+                col(MemberOf.member_id).in_([user.id for user in users.values()])
+            )
+        ).scalars()
+    }
+
+    new_member_ids = [user.id for user in users.values() if user.id not in memberships]
+    invited: dict[uuid.UUID, uuid.UUID] = {}
+    if new_member_ids:
+        # A concurrent invite of the same user wins the race, ours is then reported as existing
+        invited = dict(
+            session.execute(
+                insert(MemberOf)
+                .values([
+                    {"id": uuid.uuid4(), "organization_id": current_user.id, "member_id": member_id, "is_pending": True}
+                    for member_id in new_member_ids
+                ])
+                .on_conflict_do_nothing(index_elements=["organization_id", "member_id"])
+                .returning(col(MemberOf.member_id), col(MemberOf.id))
+            ).tuples().all()
+        )
+
+    results = []
+    for email in emails:
+        user = users.get(email)
+        if not user:
+            results.append(InvitationResult(email=email, status=INVITATION_USER_NOT_FOUND))
+        elif user.id in invited:
+            results.append(InvitationResult(
+                email=email, status=INVITATION_INVITED, member=_member_info(invited[user.id], user, True)
+            ))
+        elif user.id in memberships:
+            membership = memberships[user.id]
+            results.append(InvitationResult(
+                email=email,
+                status=INVITATION_ALREADY_MEMBER,
+                member=_member_info(membership.id, user, membership.is_pending),
+            ))
+        else:
+            results.append(InvitationResult(email=email, status=INVITATION_ALREADY_MEMBER))
+    # Committed once the results are built, loaded users would be expired and fetched again
+    session.commit()
+    return InvitationResults(data=results, count=len(results))
+
+@router.get(
+    "/members",
+    dependencies=[Depends(get_async_current_active_organization), query_budget(3)],
+    response_model=MembersResponse,
+)
+async def get_members(
+    session: AsyncReadSessionDep,
+    current_user: AsyncCurrentUser,
+    limit: int | None = None,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
 ) -> Any:
     """
     Get all members of the current organization.
+
+    Without a limit every member is returned, otherwise pages are chained through next_cursor.
     """
-    memberships = session.exec(
+    statement = (
         select(MemberOf)
         .options(joinedload(MemberOf.member))
         .where(MemberOf.organization_id == current_user.id)
-    ).all()
+    )
+    if limit is not None:
+        statement = paginate(statement, MemberOf.id, skip=0, limit=limit, cursor=cursor)
+    memberships = (await session.exec(statement)).all()
     
 
     member_infos = []
@@ -81,9 +186,25 @@ def get_members(
                 is_pending=membership.is_pending
             )
         )
-    return MembersResponse(data=member_infos, count=len(member_infos))
+    if limit is None:
+        return MembersResponse(data=member_infos, count=len(member_infos))
+
+    count = await acount_rows(
+        session,
+        select(col(MemberOf.id)).where(col(MemberOf.organization_id) == current_user.id),
+        count_mode,
+    )
+    return MembersResponse(
+        data=member_infos,
+        count=count,
+        next_cursor=next_page_cursor([m.id for m in member_infos], limit),
+    )
 
-@router.delete("/members/{member_id}", dependencies=[Depends(get_current_active_organization)], response_model=bool)
+@router.delete(
+    "/members/{member_id}",
+    dependencies=[Depends(get_current_active_organization), query_budget(4)],
+    response_model=bool,
+)
 def delete_member(
     member_id: uuid.UUID,
     session: SessionDep,
@@ -101,18 +222,42 @@ def delete_member(
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
 
-    member = member[0]
-    drop_off_points = session.exec(
-        select(DropOffPoint).where(
-            DropOffPoint.responsible_id == member.id
-        )
-    ).all()
+    crud.delete_membership(session=session, membership_id=member[0].id)
+    return True
 
-    for drop_off_point in drop_off_points:
-        drop_off_point = drop_off_point[0]
-        drop_off_point.responsible_id = None
-        session.add(drop_off_point)
-    
-    session.delete(member)
+
+@router.post(
+    "/members/{member_id}/reassign",
+    dependencies=[Depends(get_current_active_organization), query_budget(3)],
+    response_model=ReassignmentResponse,
+)
+def reassign_member_drop_off_points(
+    member_id: uuid.UUID,
+    to_member_id: uuid.UUID,
+    session: SessionDep,
+    current_user: CurrentUser
+) -> Any:
+    """
+    Make another member responsible for all the drop off points of a member.
+    """
+    if to_member_id == member_id:
+        raise HTTPException(status_code=400, detail="Cannot reassign drop off points to the same member")
+    memberships = {
+        membership.id: membership
+        for membership in session.execute(
+            select(MemberOf).where(
+                col(MemberOf.organization_id) == current_user.id,
+                col(MemberOf.id).in_([member_id, to_member_id])
+            )
+        ).scalars()
+    }
+    if member_id not in memberships:
+        raise HTTPException(status_code=404, detail="Member not found")
+    if to_member_id not in memberships or memberships[to_member_id].is_pending:
+        raise HTTPException(status_code=404, detail="Member not found in organization")
+
+    count = crud.reassign_drop_off_points(
+        session=session, from_membership_id=member_id, to_membership_id=to_member_id
+    )
     session.commit()
-    return True
+    return ReassignmentResponse(count=count)
@@ -2,15 +2,20 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
+    AsyncCurrentUser,
     CurrentUser,
+    ReadSessionDep,
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.pagination import CountMode, count_rows, next_page_cursor, paginate
 from app.core.config import settings
+from app.core.principals import principal_cache
+from app.core.query_inspector import query_budget
 from app.core.security import get_password_hash, verify_password
 from app.models import (
     DropOffPoint,
@@ -31,21 +36,28 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get(
     "/",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_current_active_superuser), query_budget(3)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: ReadSessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count_mode: CountMode = "exact",
+) -> Any:
     """
     Retrieve users.
     """
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    count = count_rows(session, select(User.id), count_mode)
 
-    statement = select(User).offset(skip).limit(limit)
+    statement = paginate(select(User), User.id, skip=skip, limit=limit, cursor=cursor)
     users = session.exec(statement).all()
 
-    return UsersPublic(data=users, count=count)
+    return UsersPublic(
+        data=users, count=count, next_cursor=next_page_cursor([u.id for u in users], limit)
+    )
 
 
 @router.post(
@@ -65,9 +77,10 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     user = crud.create_user(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
-            email_to=user_in.email, username=user_in.email, password=user_in.password
+            email_to=user_in.email, username=user_in.email
         )
         send_email(
+            session=session,
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -93,6 +106,7 @@ def update_user_me(
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
     session.commit()
+    principal_cache.invalidate(current_user.id)
     session.refresh(current_user)
     return current_user
 
@@ -118,7 +132,7 @@ def update_password_me(
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+async def read_user_me(current_user: AsyncCurrentUser) -> Any:
     """
     Get current user.
     """
@@ -134,8 +148,10 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
+    user_id = current_user.id
     session.delete(current_user)
     session.commit()
+    principal_cache.invalidate(user_id)
     return Message(message="User deleted successfully")
 
 
@@ -223,4 +239,5 @@ def delete_user(
     session.exec(statement)  # type: ignore
     session.delete(user)
     session.commit()
+    principal_cache.invalidate(user_id)
     return Message(message="User deleted successfully")
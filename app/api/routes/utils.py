@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
-from app.api.deps import get_current_active_superuser
-from app.models import Message
+from app.api.deps import SessionDep, get_current_active_superuser
+from app.core.db import async_engine, engine
+from app.core.db_pool import pool_stats
+from app.core.replicas import replica_router
+from app.core.security import password_hasher
+from app.models import DatabasePoolStats, Message, PasswordHasherStats
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -13,12 +17,13 @@ router = APIRouter(prefix="/utils", tags=["utils"])
     dependencies=[Depends(get_current_active_superuser)],
     status_code=201,
 )
-def test_email(email_to: EmailStr) -> Message:
+def test_email(session: SessionDep, email_to: EmailStr) -> Message:
     """
     Test emails.
     """
     email_data = generate_test_email(email_to=email_to)
     send_email(
+        session=session,
         email_to=email_to,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -26,6 +31,34 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/password-hasher-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=PasswordHasherStats,
+)
+def read_password_hasher_stats() -> PasswordHasherStats:
+    """
+    Password hashing pool queue depth and latency for the worker serving the request.
+    """
+    return password_hasher.stats()
+
+
+@router.get(
+    "/db-pool-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=list[DatabasePoolStats],
+)
+def read_db_pool_stats() -> list[DatabasePoolStats]:
+    """
+    Connection pool usage and checkout wait times for the worker serving the request.
+    """
+    stats = [pool_stats("sync", engine), pool_stats("async", async_engine.sync_engine)]
+    for replica in replica_router.replicas:
+        stats.append(pool_stats(f"{replica.name}_sync", replica.engine))
+        stats.append(pool_stats(f"{replica.name}_async", replica.async_engine.sync_engine))
+    return stats
+
+
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
@@ -0,0 +1,88 @@
+"""
+Local stand-in for the Addok geocoder, so benchmarks measure the API and not the network.
+
+    python -m app.benchmarks.addok_stub --port 7878
+
+Then start the API with ADDOK_API_URL=http://localhost:7878. Every query
+geocodes to a point in France derived from its hash, after an optional delay
+mimicking Addok's latency.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+
+import uvicorn
+from fastapi import FastAPI, Form, UploadFile
+from fastapi.responses import PlainTextResponse
+
+from app.benchmarks.population import MAX_LAT, MAX_LON, MIN_LAT, MIN_LON
+
+
+def coordinates_for(query: str) -> tuple[float, float]:
+    """
+    Deterministic (longitude, latitude) for a query.
+    """
+    digest = hashlib.sha256(query.encode()).digest()
+    x = int.from_bytes(digest[:4], "big") / 2**32
+    y = int.from_bytes(digest[4:8], "big") / 2**32
+    return MIN_LON + x * (MAX_LON - MIN_LON), MIN_LAT + y * (MAX_LAT - MIN_LAT)
+
+
+def create_app(latency_seconds: float = 0.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/search")
+    async def search(q: str, limit: int = 5) -> dict[str, object]:
+        await asyncio.sleep(latency_seconds)
+        longitude, latitude = coordinates_for(q)
+        return {
+            "type": "FeatureCollection",
+            "version": "draft",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+                    "properties": {
+                        "label": q,
+                        "score": 0.9,
+                        "id": hashlib.sha1(q.encode()).hexdigest()[:12],
+                        "name": q,
+                        "type": "housenumber",
+                    },
+                }
+            ],
+            "attribution": "benchmark",
+            "licence": "none",
+            "query": q,
+            "limit": limit,
+        }
+
+    @app.post("/search/csv/")
+    async def search_csv(data: UploadFile, columns: str = Form("q")) -> PlainTextResponse:
+        await asyncio.sleep(latency_seconds)
+        rows = list(csv.DictReader(io.StringIO((await data.read()).decode())))
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow([columns, "longitude", "latitude", "result_label", "result_score"])
+        for row in rows:
+            longitude, latitude = coordinates_for(row[columns])
+            writer.writerow([row[columns], longitude, latitude, row[columns], 0.9])
+        return PlainTextResponse(output.getvalue(), media_type="text/csv")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="delay added to every lookup")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms / 1000), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Print the throughput and latency changes between two benchmark reports.
+
+    python -m app.benchmarks.compare base.json head.json
+"""
+
+import argparse
+import json
+from typing import Any
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms", "errors")
+
+
+def compare(base: dict[str, Any], head: dict[str, Any]) -> list[str]:
+    lines = [f"{'scenario':<18}{'metric':<8}{'base':>12}{'head':>12}{'change':>10}"]
+    for name, head_results in head["scenarios"].items():
+        base_results = base["scenarios"].get(name)
+        if base_results is None:
+            continue
+        for metric in METRICS:
+            before, after = base_results[metric], head_results[metric]
+            change = f"{(after - before) / before:+.1%}" if before else "n/a"
+            lines.append(f"{name:<18}{metric:<8}{before:>12}{after:>12}{change:>10}")
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    args = parser.parse_args()
+    with open(args.base) as base, open(args.head) as head:
+        print("\n".join(compare(json.load(base), json.load(head))))
+
+
+if __name__ == "__main__":
+    main()
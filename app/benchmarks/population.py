@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+
+# Number of drop off points for each named scale
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+PASSWORD = "benchmark-password"
+
+# Bounding box of metropolitan France, where seeded points are spread
+MIN_LAT, MAX_LAT = 42.3, 51.1
+MIN_LON, MAX_LON = -4.8, 8.2
+
+
+def user_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def organization_email(index: int) -> str:
+    return f"bench-org-{index}@example.com"
+
+
+def parse_scale(value: str) -> int:
+    return SCALES.get(value.lower()) or int(value)
+
+
+@dataclass(frozen=True)
+class Population:
+    """
+    Sizes of the seeded data set, derived from the number of drop off points.
+
+    Users with an even index are members of organization index % organizations,
+    users with an odd index belong to no organization.
+    """
+
+    drop_off_points: int
+
+    @property
+    def users(self) -> int:
+        return max(self.drop_off_points // 10, 10)
+
+    @property
+    def organizations(self) -> int:
+        return max(self.drop_off_points // 1000, 2)
+
+    def organization_of(self, user_index: int) -> int | None:
+        if user_index % 2:
+            return None
+        return user_index % self.organizations
@@ -0,0 +1,289 @@
+"""
+Drive load against a running API and write throughput and latency percentiles as JSON.
+
+    python -m app.benchmarks.run --scale 100k --duration 30 --concurrency 50 --output bench.json
+
+Seed the database first with app.benchmarks.seed at the same scale, and start
+the API against the Addok stub (app.benchmarks.addok_stub) with the login
+rate limits disabled (LOGIN_RATE_LIMIT_IP_ATTEMPTS=0,
+LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS=0 and LOGIN_RATE_LIMIT_ACCOUNT_TOTAL_ATTEMPTS=0),
+otherwise most logins get a 429.
+Compare two reports with app.benchmarks.compare.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import subprocess
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+
+from app.benchmarks.population import (
+    MAX_LAT,
+    MAX_LON,
+    MIN_LAT,
+    MIN_LON,
+    PASSWORD,
+    Population,
+    organization_email,
+    parse_scale,
+    user_email,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# One line per request would drown the results
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Accounts logged in before the measured scenarios start
+SESSION_USERS = 20
+SESSION_ORGANIZATIONS = 2
+
+
+@dataclass
+class Recorder:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter[str] = field(default_factory=Counter)
+    errors: int = 0
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.latencies.append(time.perf_counter() - started)
+            self.statuses[type(e).__name__] += 1
+            self.errors += 1
+            return None
+        self.latencies.append(time.perf_counter() - started)
+        self.statuses[str(response.status_code)] += 1
+        if not response.is_success:
+            self.errors += 1
+        return response
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict[str, Any]:
+    latencies = sorted(recorder.latencies)
+    return {
+        "requests": len(latencies),
+        "errors": recorder.errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "status_codes": dict(sorted(recorder.statuses.items())),
+    }
+
+
+@dataclass
+class Context:
+    api: str
+    population: Population
+    bulk_size: int
+    user_tokens: dict[int, str]
+    organization_tokens: dict[int, str]
+    # (organization, user) pairs with a membership being churned
+    churning: set[tuple[int, int]] = field(default_factory=set)
+
+
+def _auth(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _login(client: httpx.AsyncClient, api: str, email: str) -> str:
+    response = await client.post(
+        f"{api}/login/access-token", data={"username": email, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    return str(response.json()["access_token"])
+
+
+async def login_storm(client: httpx.AsyncClient, context: Context, recorder: Recorder) -> None:
+    email = user_email(random.randrange(context.population.users))
+    await recorder.request(
+        client, "POST", f"{context.api}/login/access-token",
+        data={"username": email, "password": PASSWORD},
+    )
+
+
+async def map_listing(client: httpx.AsyncClient, context: Context, recorder: Recorder) -> None:
+    headers = _auth(random.choice(list(context.user_tokens.values())))
+    response = await recorder.request(
+        client, "GET", f"{context.api}/drop-off-points/",
+        params={"limit": 100}, headers=headers,
+    )
+    if response is not None and response.is_success and response.json()["next_cursor"]:
+        await recorder.request(
+            client, "GET", f"{context.api}/drop-off-points/",
+            params={"limit": 100, "cursor": response.json()["next_cursor"], "count_mode": "none"},
+            headers=headers,
+        )
+    # A viewport of about a tenth of the seeded area
+    lat = random.uniform(MIN_LAT, MAX_LAT - 1)
+    lon = random.uniform(MIN_LON, MAX_LON - 1.5)
+    await recorder.request(
+        client, "GET", f"{context.api}/drop-off-points/clusters",
+        params={"zoom": 8, "min_lat": lat, "min_lon": lon, "max_lat": lat + 1, "max_lon": lon + 1.5},
+        headers=headers,
+    )
+
+
+async def bulk_create(client: httpx.AsyncClient, context: Context, recorder: Recorder) -> None:
+    token = random.choice(list(context.user_tokens.values()))
+    batch = random.getrandbits(32)
+    await recorder.request(
+        client, "POST", f"{context.api}/drop-off-points/bulk",
+        json=[
+            {"title": f"Bulk {batch} {index}", "address": f"{index} avenue du Bulk {batch}"}
+            for index in range(context.bulk_size)
+        ],
+        headers=_auth(token),
+    )
+
+
+async def membership_churn(client: httpx.AsyncClient, context: Context, recorder: Recorder) -> None:
+    # Users with an odd index belong to no organization, see Population
+    candidates = [
+        (organization, user)
+        for organization in context.organization_tokens
+        for user in context.user_tokens
+        if user % 2 and (organization, user) not in context.churning
+    ]
+    if not candidates:
+        await asyncio.sleep(0.01)
+        return
+    organization, user = random.choice(candidates)
+    context.churning.add((organization, user))
+    organization_headers = _auth(context.organization_tokens[organization])
+    try:
+        response = await recorder.request(
+            client, "POST", f"{context.api}/organizations/invite",
+            params={"email": user_email(user)}, headers=organization_headers,
+        )
+        if response is None or not response.is_success:
+            return
+        membership_id = response.json()["id"]
+        await recorder.request(
+            client, "POST", f"{context.api}/members/invitations/{membership_id}/accept",
+            headers=_auth(context.user_tokens[user]),
+        )
+        await recorder.request(
+            client, "GET", f"{context.api}/organizations/members",
+            params={"limit": 100}, headers=organization_headers,
+        )
+        await recorder.request(
+            client, "DELETE", f"{context.api}/organizations/members/{membership_id}",
+            headers=organization_headers,
+        )
+    finally:
+        context.churning.discard((organization, user))
+
+
+Scenario = Callable[[httpx.AsyncClient, Context, Recorder], Awaitable[None]]
+
+SCENARIOS: dict[str, Scenario] = {
+    "login_storm": login_storm,
+    "map_listing": map_listing,
+    "bulk_create": bulk_create,
+    "membership_churn": membership_churn,
+}
+
+
+async def run_scenario(
+    scenario: Scenario, client: httpx.AsyncClient, context: Context, *, concurrency: int, duration: float
+) -> dict[str, Any]:
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            await scenario(client, context, recorder)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(recorder, time.perf_counter() - started)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    api = args.base_url.rstrip("/") + "/api/v1"
+    population = Population(drop_off_points=parse_scale(args.scale))
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        # Odd and even users, so churn has candidates and listings see organization points
+        user_indexes = range(min(SESSION_USERS, population.users))
+        organization_indexes = range(min(SESSION_ORGANIZATIONS, population.organizations))
+        context = Context(
+            api=api,
+            population=population,
+            bulk_size=args.bulk_size,
+            user_tokens={i: await _login(client, api, user_email(i)) for i in user_indexes},
+            organization_tokens={
+                i: await _login(client, api, organization_email(i)) for i in organization_indexes
+            },
+        )
+        results = {}
+        for name in args.scenario or list(SCENARIOS):
+            logger.info(f"Running {name} for {args.duration}s with {args.concurrency} clients")
+            results[name] = await run_scenario(
+                SCENARIOS[name], client, context, concurrency=args.concurrency, duration=args.duration
+            )
+            logger.info(f"{name}: {results[name]}")
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "scale": population.drop_off_points,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "scenarios": results,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scale", default="10k", help="scale the database was seeded with")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="repeatable, all by default")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--bulk-size", type=int, default=100, help="drop off points per bulk request")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
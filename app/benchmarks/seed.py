@@ -0,0 +1,172 @@
+"""
+Seed the database with benchmark users, organizations, memberships and drop off points.
+
+    python -m app.benchmarks.seed --scale 100k
+    python -m app.benchmarks.seed --reset
+
+Every seeded account has a bench-*@example.com email and the same password,
+see app/benchmarks/population.py. Reseeding first removes the previous rows.
+"""
+
+import argparse
+import logging
+import random
+import uuid
+from collections.abc import Iterator
+from typing import Any
+
+from sqlmodel import Session, col, delete, insert, or_, select
+
+from app.benchmarks.population import (
+    MAX_LAT,
+    MAX_LON,
+    MIN_LAT,
+    MIN_LON,
+    PASSWORD,
+    Population,
+    organization_email,
+    parse_scale,
+    user_email,
+)
+from app.core.db import engine
+from app.core.geo import geohash_for
+from app.core.security import pwd_context
+from app.models import GEOCODE_DONE, DropOffPoint, MemberOf, User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT, well under Postgres' 65535 parameters
+BATCH_SIZE = 2000
+
+
+def _batches(rows: Iterator[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(session: Session, model: Any, rows: Iterator[dict[str, Any]]) -> int:
+    count = 0
+    for batch in _batches(rows):
+        session.execute(insert(model).values(batch))
+        session.commit()
+        count += len(batch)
+        logger.info(f"{model.__name__}: {count} rows")
+    return count
+
+
+def reset(session: Session) -> None:
+    bench_users = select(User.id).where(col(User.email).like("bench-%@example.com"))
+    session.execute(delete(DropOffPoint).where(col(DropOffPoint.owner_id).in_(bench_users)))
+    session.execute(
+        delete(MemberOf).where(
+            or_(col(MemberOf.organization_id).in_(bench_users), col(MemberOf.member_id).in_(bench_users))
+        )
+    )
+    session.execute(delete(User).where(col(User.id).in_(bench_users)))
+    session.commit()
+
+
+def seed(session: Session, population: Population, *, rng: random.Random) -> None:
+    # Hashing once keeps seeding fast, logins still pay the full hash cost
+    hashed_password = pwd_context.hash(PASSWORD)
+    organization_ids = [uuid.uuid4() for _ in range(population.organizations)]
+    user_ids = [uuid.uuid4() for _ in range(population.users)]
+
+    _insert(session, User, (
+        {
+            "id": organization_ids[index],
+            "email": organization_email(index),
+            "full_name": f"Benchmark organization {index}",
+            "is_organization": True,
+            "hashed_password": hashed_password,
+        }
+        for index in range(population.organizations)
+    ))
+    _insert(session, User, (
+        {
+            "id": user_ids[index],
+            "email": user_email(index),
+            "full_name": f"Benchmark user {index}",
+            "hashed_password": hashed_password,
+        }
+        for index in range(population.users)
+    ))
+
+    # Accepted memberships per organization, candidates for responsible_id
+    responsibles: list[list[uuid.UUID]] = [[] for _ in organization_ids]
+    memberships = []
+    for index in range(population.users):
+        organization = population.organization_of(index)
+        if organization is None:
+            continue
+        membership_id = uuid.uuid4()
+        is_pending = index % 20 == 0
+        if not is_pending:
+            responsibles[organization].append(membership_id)
+        memberships.append({
+            "id": membership_id,
+            "organization_id": organization_ids[organization],
+            "member_id": user_ids[index],
+            "is_pending": is_pending,
+        })
+    _insert(session, MemberOf, iter(memberships))
+
+    def drop_off_points() -> Iterator[dict[str, Any]]:
+        for index in range(population.drop_off_points):
+            latitude = rng.uniform(MIN_LAT, MAX_LAT)
+            longitude = rng.uniform(MIN_LON, MAX_LON)
+            responsible_id = None
+            # One point in five belongs to an organization, half of those have a responsible
+            if index % 5 == 0:
+                organization = rng.randrange(population.organizations)
+                owner_id = organization_ids[organization]
+                if index % 10 == 0 and responsibles[organization]:
+                    responsible_id = rng.choice(responsibles[organization])
+            else:
+                owner_id = rng.choice(user_ids)
+            yield {
+                "id": uuid.uuid4(),
+                "title": f"Benchmark point {index}",
+                "address": f"{index} rue du Benchmark",
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geohash_for(latitude, longitude),
+                "geocode_status": GEOCODE_DONE,
+                "geocode_attempts": 0,
+                "owner_id": owner_id,
+                "responsible_id": responsible_id,
+                "is_done": index % 3 == 0,
+            }
+
+    _insert(session, DropOffPoint, drop_off_points())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--scale", default="10k", help="drop off points to create: 10k, 100k, 1m or a number"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed for coordinates and owners")
+    parser.add_argument("--reset", action="store_true", help="only remove the benchmark rows")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        logger.info("Removing previous benchmark rows")
+        reset(session)
+        if args.reset:
+            return
+        population = Population(drop_off_points=parse_scale(args.scale))
+        logger.info(f"Seeding {population}")
+        seed(session, population, rng=random.Random(args.seed))
+    logger.info("Benchmark data seeded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import asyncio
+import csv
+import io
+import logging
+from typing import Any
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.core.config import settings
+from app.models import (
+    AddressFeature,
+    AddressGeometry,
+    AddressProperties,
+    AddressResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AddokError(Exception):
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    return (
+        isinstance(exc, AddokError)
+        and exc.status_code is not None
+        and exc.status_code >= 500
+    )
+
+
+def _csv_feature(row: dict[str, str]) -> AddressFeature:
+    # Addok appends the properties of the match as result_* columns
+    properties = {
+        name: row[f"result_{name}"]
+        for name in ("label", "score", "id", "name", "postcode", "citycode", "city", "context", "type")
+        if row.get(f"result_{name}")
+    }
+    return AddressFeature(
+        type="Feature",
+        geometry=AddressGeometry(
+            type="Point", coordinates=[float(row["longitude"]), float(row["latitude"])]
+        ),
+        properties=AddressProperties.model_validate(properties),
+    )
+
+
+class AddokClient:
+    """
+    Async client for the Addok geocoder.
+
+    A single `httpx.AsyncClient` is shared by every request of a worker so
+    connections are kept alive, and a semaphore bounds how many lookups can be
+    in flight at once. The client is created lazily on the running event loop
+    and must be closed with `aclose()` on shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        timeout: float,
+        connect_timeout: float,
+        max_connections: int,
+        max_concurrency: int,
+        max_retries: int,
+        retry_backoff: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        # Pooled connections and the semaphore are bound to the loop they were created on
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    async def _request(
+        self, method: str, path: str, **kwargs: Any
+    ) -> httpx.Response:
+        client = self._get_client()
+        assert self._semaphore is not None
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.max_retries + 1),
+                wait=wait_exponential(multiplier=self.retry_backoff),
+                retry=retry_if_exception(_is_retryable),
+                reraise=True,
+            ):
+                with attempt:
+                    async with self._semaphore:
+                        response = await client.request(method, path, **kwargs)
+                    if not response.is_success:
+                        raise AddokError(
+                            f"Addok responded {response.status_code} on {path}",
+                            status_code=response.status_code,
+                        )
+        except httpx.TransportError as e:
+            # Out of retries, an unreachable Addok is reported like any other failed lookup
+            raise AddokError(f"Addok unreachable on {path}: {e!r}") from e
+        return response
+
+    async def search(self, query: str, limit: int | None = None) -> AddressResponse:
+        params: dict[str, Any] = {"q": query}
+        if limit is not None:
+            params["limit"] = limit
+        response = await self._request("GET", "/search", params=params)
+        return AddressResponse.model_validate(response.json())
+
+    async def search_csv(self, queries: list[str]) -> list[AddressFeature | None]:
+        """
+        Geocode many queries in one round trip through Addok's /search/csv/ endpoint.
+
+        Returns the best matching feature per query, in order, or None when
+        Addok found no match.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["q"])
+        writer.writerows([query] for query in queries)
+        response = await self._request(
+            "POST",
+            "/search/csv/",
+            data={"columns": "q"},
+            files={"data": ("addresses.csv", buffer.getvalue(), "text/csv")},
+        )
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        if len(rows) != len(queries):
+            raise AddokError(
+                f"Addok returned {len(rows)} rows for {len(queries)} queries"
+            )
+        results: list[AddressFeature | None] = []
+        for row in rows:
+            if row.get("longitude") and row.get("latitude"):
+                results.append(_csv_feature(row))
+            else:
+                results.append(None)
+        return results
+
+
+addok_client = AddokClient(
+    base_url=str(settings.ADDOK_API_URL),
+    timeout=settings.ADDOK_TIMEOUT_SECONDS,
+    connect_timeout=settings.ADDOK_CONNECT_TIMEOUT_SECONDS,
+    max_connections=settings.ADDOK_MAX_CONNECTIONS,
+    max_concurrency=settings.ADDOK_MAX_CONCURRENCY,
+    max_retries=settings.ADDOK_MAX_RETRIES,
+    retry_backoff=settings.ADDOK_RETRY_BACKOFF_SECONDS,
+)
@@ -35,6 +35,54 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Authenticated users are cached per worker, changes made through another
+    # worker are seen after at most this delay
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+    # Scheme for new password hashes, older hashes are upgraded on login.
+    # argon2 (argon2id) needs the argon2-cffi package, startup fails without
+    # it, see app/password_hash_calibration.py to pick costs for the host
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    # In KiB
+    PASSWORD_ARGON2_MEMORY_COST: int = 64 * 1024
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    # Login attempts allowed per client IP, per account and client IP, and per
+    # account from every IP in a burst, refilled over the period. 0 attempts
+    # disables a limit.
+    LOGIN_RATE_LIMIT_IP_ATTEMPTS: int = 20
+    LOGIN_RATE_LIMIT_IP_PERIOD_SECONDS: float = 60.0
+    LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS: int = 5
+    LOGIN_RATE_LIMIT_ACCOUNT_PERIOD_SECONDS: float = 300.0
+    # Higher, as failed attempts from anywhere also lock the owner out
+    LOGIN_RATE_LIMIT_ACCOUNT_TOTAL_ATTEMPTS: int = 50
+    LOGIN_RATE_LIMIT_ACCOUNT_TOTAL_PERIOD_SECONDS: float = 3600.0
+    RATE_LIMIT_MAX_ENTRIES: int = 100_000
+    # Header in which the reverse proxy passes the client IP, e.g.
+    # X-Forwarded-For, its last value is used. Unset, the peer address is used.
+    # Only set it when every request comes through the proxy, clients can
+    # send any value otherwise.
+    CLIENT_IP_HEADER: str | None = None
+    # Processes hashing passwords, 0 hashes inline on the calling thread
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hash operations queued or running before new ones are refused with a 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Directory shared by the uvicorn workers of a host for /metrics to add up
+    # their counters, emptied before the workers start. Unset, /metrics only
+    # reports the worker answering it.
+    METRICS_MULTIPROC_DIR: str | None = None
+    # How often each worker writes its metrics to METRICS_MULTIPROC_DIR
+    METRICS_FLUSH_SECONDS: float = 5.0
+    # Per request SQL instrumentation for development and staging: requests
+    # over these thresholds are logged, see app/core/query_inspector.py
+    QUERY_INSPECTOR_ENABLED: bool = False
+    QUERY_INSPECTOR_MAX_STATEMENTS: int = 20
+    # Same statement shape run more often than this in a request, usually an N+1
+    QUERY_INSPECTOR_MAX_DUPLICATES: int = 5
+    QUERY_INSPECTOR_SLOW_STATEMENT_MS: float = 200.0
+    # Fail requests exceeding their route's query_budget, meant for the test suite
+    QUERY_INSPECTOR_ENFORCE_BUDGETS: bool = False
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -57,6 +105,29 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
 
+    # Connections per engine and uvicorn worker, the sync and async engines each have a pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # Reconnect before Postgres or a proxy drops idle connections
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer in transaction mode: no app side pool, no prepared statements
+    DB_PGBOUNCER: bool = False
+    # Streaming replicas serving the read-only GET handlers, comma separated
+    # postgresql+psycopg:// DSNs. Empty reads everything from the primary.
+    READ_REPLICA_DATABASE_URIS: Annotated[
+        list[PostgresDsn] | str, BeforeValidator(parse_cors)
+    ] = []
+    # A replica that refused a connection is skipped for this long
+    READ_REPLICA_RETRY_SECONDS: float = 30.0
+    # Clients read from the primary for this long after a write, longer than
+    # the replication lag. Browsers must send credentials (cookies) for it,
+    # bearer token clients are only covered by the worker that took the write.
+    READ_REPLICA_STICKY_SECONDS: float = 10.0
+    # Token subjects whose last write each worker remembers
+    READ_REPLICA_STICKY_MAX_ENTRIES: int = 10_000
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
@@ -77,6 +148,21 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str | None = None
     EMAILS_FROM_EMAIL: EmailStr | None = None
     EMAILS_FROM_NAME: EmailStr | None = None
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    # An SMTP connection unused for this long is checked with a NOOP before reuse
+    SMTP_IDLE_SECONDS: float = 30.0
+
+    # Background delivery of the email outbox
+    EMAIL_WORKER_ENABLED: bool = True
+    EMAIL_WORKER_CONCURRENCY: int = 1
+    EMAIL_WORKER_BATCH_SIZE: int = 50
+    EMAIL_WORKER_POLL_SECONDS: float = 30.0
+    EMAIL_WORKER_LEASE_SECONDS: float = 300.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 30.0
+    # Sent and failed emails are deleted from the outbox after this long
+    EMAIL_OUTBOX_RETENTION_DAYS: float = 30.0
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: float = 3600.0
 
     @model_validator(mode="after")
     def _set_default_emails_from(self) -> Self:
@@ -85,6 +171,8 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
+    # Compiled email templates are also cached on disk there, shared by the workers
+    EMAIL_TEMPLATES_BYTECODE_CACHE_DIR: str | None = None
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -96,6 +184,34 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
 
     ADDOK_API_URL: HttpUrl
+    ADDOK_TIMEOUT_SECONDS: float = 5.0
+    ADDOK_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    ADDOK_MAX_CONNECTIONS: int = 20
+    ADDOK_MAX_CONCURRENCY: int = 10
+    ADDOK_MAX_RETRIES: int = 2
+    ADDOK_RETRY_BACKOFF_SECONDS: float = 0.2
+    # Number of addresses sent in each /search/csv/ request
+    ADDOK_CSV_CHUNK_SIZE: int = 500
+    DROP_OFF_POINTS_BULK_MAX: int = 5000
+    ORGANIZATION_INVITES_BULK_MAX: int = 1000
+    # Rows fetched from the server-side cursor at a time by the export endpoint
+    DROP_OFF_POINTS_EXPORT_BATCH_SIZE: int = 1000
+    # Clusters returned for one map view, the largest are kept
+    DROP_OFF_POINT_CLUSTERS_MAX: int = 1000
+
+    # Background geocoding of drop off points
+    GEOCODING_WORKER_ENABLED: bool = True
+    GEOCODING_WORKER_CONCURRENCY: int = 2
+    GEOCODING_WORKER_BATCH_SIZE: int = 50
+    GEOCODING_WORKER_POLL_SECONDS: float = 30.0
+    GEOCODING_WORKER_LEASE_SECONDS: float = 300.0
+    GEOCODING_MAX_ATTEMPTS: int = 5
+    GEOCODING_RETRY_BACKOFF_SECONDS: float = 60.0
+    GEOCODING_CACHE_MAX_ENTRIES: int = 10_000
+    # 60 seconds * 60 minutes * 24 hours * 30 days = 30 days
+    GEOCODING_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30
+    # Share cached geocoding results between workers through Postgres
+    GEOCODING_CACHE_SHARED: bool = False
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
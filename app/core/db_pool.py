@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine, exc
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    NullPool,
+    Pool,
+    QueuePool,
+)
+
+from app.core.config import settings
+from app.models import DatabasePoolStats
+
+
+class _CheckoutTimer:
+    """
+    Pool mixin recording how long checkouts wait for a connection.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.monotonic()
+        try:
+            entry: ConnectionPoolEntry = super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = time.monotonic() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return entry
+
+
+# Pools log through a logger named after their class, keep these at
+# SQLAlchemy's default level rather than the app's INFO
+logging.getLogger(__name__).setLevel(logging.WARNING)
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(*, is_async: bool) -> dict[str, Any]:
+    """
+    create_engine keyword arguments for the pool settings.
+    """
+    if settings.DB_PGBOUNCER:
+        # PgBouncer in transaction mode does the pooling and cannot keep
+        # prepared statements, which psycopg would otherwise create
+        return {"poolclass": NullPool, "connect_args": {"prepare_threshold": None}}
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def pool_stats(name: str, engine: Engine) -> DatabasePoolStats:
+    pool: Pool = engine.pool
+    stats = DatabasePoolStats(name=name, pool_class=type(pool).__name__)
+    if isinstance(pool, QueuePool):
+        stats.size = pool.size()
+        stats.checked_in = pool.checkedin()
+        stats.checked_out = pool.checkedout()
+        stats.overflow = max(pool.overflow(), 0)
+    if isinstance(pool, _CheckoutTimer):
+        with pool._stats_lock:
+            stats.checkouts = pool.checkouts
+            stats.timeouts = pool.timeouts
+            stats.average_wait_seconds = (
+                pool.total_wait_seconds / pool.checkouts if pool.checkouts else 0.0
+            )
+            stats.max_wait_seconds = pool.max_wait_seconds
+    return stats
@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import smtplib
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr
+from functools import partial
+from typing import Any, cast
+
+from anyio import to_thread
+from sqlalchemy import CursorResult
+from sqlmodel import Session, col, delete, or_, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENT, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnection:
+    """
+    SMTP session kept open across messages instead of one connection per email.
+
+    A session unused for idle_seconds is checked with a NOOP before reuse, and
+    a session the server dropped is reopened once before giving up on a message.
+    Not thread-safe: each worker task owns its connection.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        tls: bool,
+        ssl: bool,
+        user: str | None,
+        password: str | None,
+        timeout: float,
+        idle_seconds: float,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.ssl = ssl
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self._smtp: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def _open(self) -> smtplib.SMTP:
+        smtp: smtplib.SMTP
+        if self.ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.tls:
+                smtp.starttls()
+        if self.user:
+            smtp.login(self.user, self.password or "")
+        return smtp
+
+    def _get(self) -> smtplib.SMTP:
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_seconds:
+            try:
+                self._smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._smtp is None:
+            self._smtp = self._open()
+        return self._smtp
+
+    def send(self, message: EmailMessage) -> None:
+        for attempt in range(2):
+            smtp = self._get()
+            try:
+                smtp.send_message(message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+                continue
+            self._last_used = time.monotonic()
+            return
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._smtp = None
+
+
+@dataclass
+class SendError:
+    message: str
+    # The relay refused this email for good, retrying gets the same answer
+    permanent: bool
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    Whether an SMTP error is a 5xx refusal of the email itself.
+
+    Refused senders and logins are configuration errors that affect every
+    email, they are retried like temporary errors until fixed.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPDataError):
+        return error.smtp_code >= 500
+    return False
+
+
+def build_message(outbox: EmailOutbox) -> EmailMessage:
+    assert settings.EMAILS_FROM_EMAIL, "no provided configuration for email variables"
+    message = EmailMessage()
+    message["From"] = formataddr((settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL))
+    message["To"] = outbox.email_to
+    message["Subject"] = outbox.subject
+    message.set_content(outbox.html_content, subtype="html")
+    return message
+
+
+class EmailWorker:
+    """
+    Delivers queued emails outside of the request path.
+
+    The emailoutbox table is the queue, drained the same way as the geocoding
+    worker drains drop off points: due rows are claimed in batches with FOR
+    UPDATE SKIP LOCKED and a lease, so the uvicorn workers never send the same
+    email twice. Each task sends its batches over its own reused SMTP
+    connection, failed emails are retried with exponential backoff until
+    max_attempts is reached. Emails the relay refuses with a 5xx reply fail
+    right away.
+
+    The content of sent and failed emails is blanked, it may hold reset
+    tokens, and their rows are purged after retention_days by the first idle
+    task once every purge_interval_seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        connection_factory: Callable[[], SMTPConnection],
+        concurrency: int,
+        batch_size: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_backoff_seconds: float,
+        retention_days: float,
+        purge_interval_seconds: float,
+    ) -> None:
+        self.connection_factory = connection_factory
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retention_days = retention_days
+        self.purge_interval_seconds = purge_interval_seconds
+        self._purged_at: float | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+        self._loop = None
+
+    def wake(self) -> None:
+        """
+        Signal that new emails are queued. Safe to call from any thread.
+        """
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run_once(self, connection: SMTPConnection) -> int:
+        """
+        Claim and send one batch of due emails, returning how many were claimed.
+        """
+        claimed = await to_thread.run_sync(self._claim)
+        if not claimed:
+            return 0
+        errors = await to_thread.run_sync(self._send, connection, claimed)
+        await to_thread.run_sync(self._record, claimed, errors)
+        return len(claimed)
+
+    def purge(self) -> int:
+        """
+        Delete the sent and failed emails older than the retention, returning how many.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        with Session(engine) as session:
+            result = session.execute(
+                # Matches the partial index on sent and failed emails
+                delete(EmailOutbox).where(
+                    col(EmailOutbox.status) != EMAIL_PENDING,
+                    col(EmailOutbox.created_at) < cutoff,
+                )
+            )
+            session.commit()
+        return cast(CursorResult[Any], result).rowcount
+
+    def _purge_due(self) -> bool:
+        # The tasks share one event loop, no other task runs between the check and the update
+        now = time.monotonic()
+        if self._purged_at is not None and now - self._purged_at < self.purge_interval_seconds:
+            return False
+        self._purged_at = now
+        return True
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        connection = self.connection_factory()
+        try:
+            while True:
+                try:
+                    claimed = await self.run_once(connection)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error in email worker: {e}")
+                    claimed = 0
+                if claimed:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    # Nothing to send for a while, do not hold the relay's connection
+                    await to_thread.run_sync(connection.close)
+                    if self._purge_due():
+                        try:
+                            await to_thread.run_sync(self.purge)
+                        except Exception as e:
+                            logger.error(f"Error purging the email outbox: {e}")
+                self._wakeup.clear()
+        finally:
+            connection.close()
+
+    def _claim(self) -> list[EmailOutbox]:
+        now = datetime.now(timezone.utc)
+        with Session(engine, expire_on_commit=False) as session:
+            emails = session.exec(
+                select(EmailOutbox)
+                .where(
+                    EmailOutbox.status == EMAIL_PENDING,
+                    or_(
+                        col(EmailOutbox.next_attempt_at).is_(None),
+                        col(EmailOutbox.next_attempt_at) <= now,
+                    ),
+                )
+                .order_by(col(EmailOutbox.created_at))
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            lease = now + timedelta(seconds=self.lease_seconds)
+            for email in emails:
+                email.next_attempt_at = lease
+                session.add(email)
+            session.commit()
+        return list(emails)
+
+    def _send(self, connection: SMTPConnection, emails: list[EmailOutbox]) -> dict[uuid.UUID, SendError]:
+        errors = {}
+        for email in emails:
+            try:
+                connection.send(build_message(email))
+            except (smtplib.SMTPException, OSError) as e:
+                logger.warning(f"Error sending email {email.id}: {e}")
+                errors[email.id] = SendError(message=str(e) or type(e).__name__, permanent=is_permanent(e))
+        return errors
+
+    def _record(self, emails: list[EmailOutbox], errors: dict[uuid.UUID, SendError]) -> None:
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            for claimed in emails:
+                email = session.get(EmailOutbox, claimed.id)
+                if not email:
+                    continue
+                error = errors.get(email.id)
+                if error is None:
+                    email.status = EMAIL_SENT
+                    email.sent_at = now
+                    email.next_attempt_at = None
+                    email.html_content = ""
+                else:
+                    email.attempts += 1
+                    email.last_error = error.message
+                    if error.permanent or email.attempts >= self.max_attempts:
+                        email.status = EMAIL_FAILED
+                        email.next_attempt_at = None
+                        email.html_content = ""
+                    else:
+                        delay = self.retry_backoff_seconds * 2 ** (email.attempts - 1)
+                        email.next_attempt_at = now + timedelta(seconds=delay)
+                session.add(email)
+            session.commit()
+
+
+email_worker = EmailWorker(
+    connection_factory=partial(
+        SMTPConnection,
+        host=settings.SMTP_HOST or "localhost",
+        port=settings.SMTP_PORT,
+        tls=settings.SMTP_TLS,
+        ssl=settings.SMTP_SSL,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+        idle_seconds=settings.SMTP_IDLE_SECONDS,
+    ),
+    concurrency=settings.EMAIL_WORKER_CONCURRENCY,
+    batch_size=settings.EMAIL_WORKER_BATCH_SIZE,
+    poll_seconds=settings.EMAIL_WORKER_POLL_SECONDS,
+    lease_seconds=settings.EMAIL_WORKER_LEASE_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_backoff_seconds=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+    retention_days=settings.EMAIL_OUTBOX_RETENTION_DAYS,
+    purge_interval_seconds=settings.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,116 @@
+import math
+
+EARTH_RADIUS_METERS = 6_371_000
+# Precision of the geohash stored on drop off points, about 5m x 5m
+GEOHASH_PRECISION = 9
+# Cluster grids are aggregated for geohash precisions 1 to this one, about 150m x 150m
+CLUSTER_MAX_PRECISION = 7
+# Cluster grids sum coordinates as integers in units of 1e-7 degree, about 1cm
+GRID_COORDINATE_SCALE = 10_000_000
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars: list[str] = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            value_range[0] = mid
+        else:
+            bits = bits * 2
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_for(latitude: float | None, longitude: float | None) -> str | None:
+    if latitude is None or longitude is None:
+        return None
+    return geohash_encode(latitude, longitude)
+
+
+def _cell_size(precision: int) -> tuple[float, float]:
+    """
+    Return the (height, width) in degrees of a geohash cell.
+    """
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180 / 2**lat_bits, 360 / 2**lon_bits
+
+
+def _steps(start: float, stop: float, step: float) -> list[float]:
+    values = []
+    value = start
+    while value < stop:
+        values.append(value)
+        value += step
+    values.append(stop)
+    return values
+
+
+def covering_geohashes(
+    min_lat: float, min_lon: float, max_lat: float, max_lon: float, max_cells: int = 16
+) -> list[str]:
+    """
+    Return geohash prefixes whose cells together cover a bounding box.
+
+    The longest prefixes that need at most max_cells cells are used, so a
+    `geohash LIKE 'prefix%'` per cell stays a handful of index range scans.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = math.floor((max_lat - min_lat) / height) + 2
+        columns = math.floor((max_lon - min_lon) / width) + 2
+        if rows * columns <= max_cells:
+            break
+    cells = {
+        geohash_encode(lat, lon, precision)
+        for lat in _steps(min_lat, max_lat, height)
+        for lon in _steps(min_lon, max_lon, width)
+    }
+    return sorted(cells)
+
+
+def bounding_box(latitude: float, longitude: float, radius: float) -> tuple[float, float, float, float]:
+    """
+    Return (min_lat, min_lon, max_lat, max_lon) of the box enclosing a circle of radius meters.
+    """
+    delta_lat = math.degrees(radius / EARTH_RADIUS_METERS)
+    delta_lon = delta_lat / max(math.cos(math.radians(latitude)), 0.01)
+    return (
+        max(latitude - delta_lat, -90.0),
+        max(longitude - delta_lon, -180.0),
+        min(latitude + delta_lat, 90.0),
+        min(longitude + delta_lon, 180.0),
+    )
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points, in meters.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(a))
+
+
+def zoom_to_precision(zoom: int) -> int:
+    """
+    Pick the geohash precision whose cells are roughly a few tens of pixels at a web map zoom level.
+    """
+    return max(1, min(CLUSTER_MAX_PRECISION, (zoom * 2 + 4) // 5))
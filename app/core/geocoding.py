@@ -0,0 +1,216 @@
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+
+from anyio import to_thread
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, delete, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.db import engine
+from app.models import AddressResponse, GeocodingCacheEntry, GeocodingCacheStats
+
+logger = logging.getLogger(__name__)
+
+# Expired shared rows are purged once every this many writes
+SHARED_PURGE_EVERY = 500
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize an address query so that trivially different spellings share a cache key.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return " ".join(query.replace(",", " ").split())
+
+
+class GeocodingCache:
+    """
+    Two-tier cache for Addok search responses.
+
+    The in-process tier is a TTL + LRU cache private to each worker. When
+    `shared` is enabled, misses fall through to the `geocodingcacheentry`
+    table so every uvicorn worker benefits from lookups done by the others.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_seconds: int, shared: bool) -> None:
+        self.local: TTLCache[str, AddressResponse] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds
+        )
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self.shared_hits = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> AddressResponse | None:
+        key = normalize_query(query)
+        response = self.local.get(key)
+        if response is not None or not self.shared:
+            return response
+        return self._get_through_shared(key)
+
+    def _get_through_shared(self, key: str) -> AddressResponse | None:
+        try:
+            response = self._get_shared(key)
+        except Exception as e:
+            logger.error(f"Error reading shared geocoding cache: {e}")
+            return None
+        if response is not None:
+            with self._lock:
+                self.shared_hits += 1
+            self.local.set(key, response)
+        return response
+
+    def set(self, query: str, response: AddressResponse) -> None:
+        key = normalize_query(query)
+        self.local.set(key, response)
+        if not self.shared:
+            return
+        try:
+            self._set_shared(key, response)
+        except Exception as e:
+            logger.error(f"Error writing shared geocoding cache: {e}")
+
+    def get_many(self, queries: list[str]) -> dict[str, AddressResponse]:
+        """
+        Cached responses of many queries, local misses are read with a single shared lookup.
+        """
+        keys = {query: normalize_query(query) for query in queries}
+        found: dict[str, AddressResponse] = {}
+        for key in set(keys.values()):
+            response = self.local.get(key)
+            if response is not None:
+                found[key] = response
+        missing = [key for key in set(keys.values()) if key not in found]
+        if missing and self.shared:
+            try:
+                shared = self._get_many_shared(missing)
+            except Exception as e:
+                logger.error(f"Error reading shared geocoding cache: {e}")
+                shared = {}
+            with self._lock:
+                self.shared_hits += len(shared)
+            for key, response in shared.items():
+                self.local.set(key, response)
+            found.update(shared)
+        return {query: found[key] for query, key in keys.items() if key in found}
+
+    def set_many(self, responses: dict[str, AddressResponse]) -> None:
+        by_key = {normalize_query(query): response for query, response in responses.items()}
+        for key, response in by_key.items():
+            self.local.set(key, response)
+        if not self.shared or not by_key:
+            return
+        try:
+            self._set_many_shared(by_key)
+        except Exception as e:
+            logger.error(f"Error writing shared geocoding cache: {e}")
+
+    async def aget(self, query: str) -> AddressResponse | None:
+        # The local tier never blocks, only the shared tier is moved off the event loop
+        key = normalize_query(query)
+        response = self.local.get(key)
+        if response is not None or not self.shared:
+            return response
+        return await to_thread.run_sync(self._get_through_shared, key)
+
+    async def aset(self, query: str, response: AddressResponse) -> None:
+        if not self.shared:
+            self.set(query, response)
+            return
+        await to_thread.run_sync(self.set, query, response)
+
+    async def aget_many(self, queries: list[str]) -> dict[str, AddressResponse]:
+        if not self.shared:
+            return self.get_many(queries)
+        return await to_thread.run_sync(self.get_many, queries)
+
+    async def aset_many(self, responses: dict[str, AddressResponse]) -> None:
+        if not self.shared:
+            self.set_many(responses)
+            return
+        await to_thread.run_sync(self.set_many, responses)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared:
+            with Session(engine) as session:
+                session.exec(delete(GeocodingCacheEntry))  # type: ignore
+                session.commit()
+
+    def stats(self) -> GeocodingCacheStats:
+        local_stats = self.local.stats
+        return GeocodingCacheStats(
+            local_hits=local_stats.hits,
+            shared_hits=self.shared_hits,
+            misses=local_stats.misses - self.shared_hits,
+            evictions=local_stats.evictions,
+            size=len(self.local),
+        )
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+
+    def _get_shared(self, key: str) -> AddressResponse | None:
+        with Session(engine) as session:
+            entry = session.exec(
+                select(GeocodingCacheEntry).where(
+                    GeocodingCacheEntry.query == key,
+                    col(GeocodingCacheEntry.created_at) > self._cutoff(),
+                )
+            ).first()
+            if not entry:
+                return None
+            return AddressResponse.model_validate(entry.response)
+
+    def _get_many_shared(self, keys: list[str]) -> dict[str, AddressResponse]:
+        with Session(engine) as session:
+            entries = session.exec(
+                select(GeocodingCacheEntry).where(
+                    col(GeocodingCacheEntry.query).in_(keys),
+                    col(GeocodingCacheEntry.created_at) > self._cutoff(),
+                )
+            ).all()
+            return {
+                entry.query: AddressResponse.model_validate(entry.response)
+                for entry in entries
+            }
+
+    def _set_shared(self, key: str, response: AddressResponse) -> None:
+        self._set_many_shared({key: response})
+
+    def _set_many_shared(self, responses: dict[str, AddressResponse]) -> None:
+        now = datetime.now(timezone.utc)
+        statement = insert(GeocodingCacheEntry).values(
+            [
+                {"query": key, "response": response.model_dump(mode="json"), "created_at": now}
+                for key, response in responses.items()
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["query"],
+            set_={"response": statement.excluded.response, "created_at": statement.excluded.created_at},
+        )
+        with self._lock:
+            # Purge whenever the write count crosses a multiple of SHARED_PURGE_EVERY
+            purge = (self._writes + len(responses)) // SHARED_PURGE_EVERY > self._writes // SHARED_PURGE_EVERY
+            self._writes += len(responses)
+        with Session(engine) as session:
+            session.exec(statement)  # type: ignore
+            if purge:
+                session.exec(
+                    delete(GeocodingCacheEntry).where(  # type: ignore
+                        col(GeocodingCacheEntry.created_at) <= self._cutoff()
+                    )
+                )
+            session.commit()
+
+
+geocoding_cache = GeocodingCache(
+    max_entries=settings.GEOCODING_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GEOCODING_CACHE_TTL_SECONDS,
+    shared=settings.GEOCODING_CACHE_SHARED,
+)
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from anyio import to_thread
+from sqlmodel import Session, col, or_, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.geo import geohash_for
+from app.models import (
+    GEOCODE_DONE,
+    GEOCODE_FAILED,
+    GEOCODE_NOT_FOUND,
+    GEOCODE_PENDING,
+    DropOffPoint,
+)
+from app.utils import geocode_many
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodingWorker:
+    """
+    Fills in drop off point coordinates outside of the request path.
+
+    The dropoffpoint table is the queue: rows whose geocode_status is "pending"
+    and whose geocode_next_attempt_at is due are claimed in batches with
+    FOR UPDATE SKIP LOCKED, so the uvicorn workers never geocode the same row
+    twice. Claiming pushes geocode_next_attempt_at forward, which acts as a
+    lease: if a process dies mid-batch its rows become due again. Addresses
+    Addok has no match for are marked not_found on the first answer, rows that
+    failed on a transport or server error are retried with exponential backoff
+    until max_attempts is reached.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int,
+        batch_size: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_backoff_seconds: float,
+    ) -> None:
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._tasks: list[asyncio.Task[None]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+        self._loop = None
+
+    def wake(self) -> None:
+        """
+        Signal that new rows are pending. Safe to call from any thread.
+        """
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run_once(self) -> int:
+        """
+        Claim and geocode one batch of due rows, returning how many were claimed.
+        """
+        claimed = await to_thread.run_sync(self._claim)
+        if not claimed:
+            return 0
+        coordinates = await geocode_many(
+            [address for _, address in claimed if address]
+        )
+        await to_thread.run_sync(self._record, claimed, coordinates)
+        return len(claimed)
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in geocoding worker: {e}")
+                claimed = 0
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _claim(self) -> list[tuple[uuid.UUID, str | None]]:
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            drop_off_points = session.exec(
+                select(DropOffPoint)
+                .where(
+                    DropOffPoint.geocode_status == GEOCODE_PENDING,
+                    or_(
+                        col(DropOffPoint.geocode_next_attempt_at).is_(None),
+                        col(DropOffPoint.geocode_next_attempt_at) <= now,
+                    ),
+                )
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            lease = now + timedelta(seconds=self.lease_seconds)
+            for drop_off_point in drop_off_points:
+                drop_off_point.geocode_next_attempt_at = lease
+                session.add(drop_off_point)
+            claimed = [(p.id, p.address) for p in drop_off_points]
+            session.commit()
+        return claimed
+
+    def _record(
+        self,
+        claimed: list[tuple[uuid.UUID, str | None]],
+        coordinates: dict[str, tuple[float, float] | None],
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        with Session(engine) as session:
+            for id, address in claimed:
+                drop_off_point = session.get(DropOffPoint, id)
+                # Deleted, or edited since it was claimed: the new version is queued on its own
+                if (
+                    not drop_off_point
+                    or drop_off_point.geocode_status != GEOCODE_PENDING
+                    or drop_off_point.address != address
+                ):
+                    continue
+                # geocode_many leaves out the addresses it could not look up
+                result = coordinates.get(address) if address else None
+                if address and address in coordinates and result is None:
+                    drop_off_point.geocode_status = GEOCODE_NOT_FOUND
+                    drop_off_point.geocode_next_attempt_at = None
+                elif result:
+                    longitude, latitude = result
+                    drop_off_point.longitude = longitude
+                    drop_off_point.latitude = latitude
+                    drop_off_point.geohash = geohash_for(latitude, longitude)
+                    drop_off_point.geocode_status = GEOCODE_DONE
+                    drop_off_point.geocode_next_attempt_at = None
+                else:
+                    drop_off_point.geocode_attempts += 1
+                    if drop_off_point.geocode_attempts >= self.max_attempts:
+                        drop_off_point.geocode_status = GEOCODE_FAILED
+                        drop_off_point.geocode_next_attempt_at = None
+                    else:
+                        delay = self.retry_backoff_seconds * 2 ** (
+                            drop_off_point.geocode_attempts - 1
+                        )
+                        drop_off_point.geocode_next_attempt_at = now + timedelta(
+                            seconds=delay
+                        )
+                session.add(drop_off_point)
+            session.commit()
+
+
+geocoding_worker = GeocodingWorker(
+    concurrency=settings.GEOCODING_WORKER_CONCURRENCY,
+    batch_size=settings.GEOCODING_WORKER_BATCH_SIZE,
+    poll_seconds=settings.GEOCODING_WORKER_POLL_SECONDS,
+    lease_seconds=settings.GEOCODING_WORKER_LEASE_SECONDS,
+    max_attempts=settings.GEOCODING_MAX_ATTEMPTS,
+    retry_backoff_seconds=settings.GEOCODING_RETRY_BACKOFF_SECONDS,
+)
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+from anyio import to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.query_inspector import track_queries
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Snapshot of every metric: name -> list of [label values, value] where value
+# is a number for counters and [bucket counts..., sum, count] for histograms
+Snapshot = dict[str, list[list[Any]]]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self, registry: "MetricsRegistry", name: str, help: str, labelnames: Sequence[str]
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = registry.lock
+        self._values: dict[tuple[str, ...], Any] = {}
+        registry.metrics[name] = self
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            # Per bucket counts (not cumulative), then sum and count
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[index] += 1
+                    break
+            values[-2] += value
+            values[-1] += 1
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms rendered in the Prometheus text format.
+
+    Each uvicorn worker has its own registry. With a directory configured,
+    workers periodically write their snapshot there and the worker answering
+    a scrape adds up every snapshot, like prometheus_client's multiprocess mode.
+    """
+
+    def __init__(self, directory: str | None, flush_seconds: float) -> None:
+        self.directory = Path(directory) if directory else None
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        self.metrics: dict[str, _Metric] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def snapshot(self) -> Snapshot:
+        with self.lock:
+            return {
+                name: [
+                    [list(labels), list(value) if isinstance(value, list) else value]
+                    for labels, value in metric._values.items()
+                ]
+                for name, metric in self.metrics.items()
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            for metric in self.metrics.values():
+                metric._values.clear()
+
+    def _snapshot_path(self) -> Path:
+        assert self.directory is not None
+        return self.directory / f"metrics_{os.getpid()}.json"
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        path = self._snapshot_path()
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def collect(self) -> Snapshot:
+        """
+        Snapshot of this worker, merged with the other workers' when sharing a directory.
+        """
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        snapshots = []
+        for path in self.directory.glob("metrics_*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                logger.warning(f"Skipping unreadable metrics snapshot {path}")
+        return merge_snapshots(snapshots)
+
+    def render(self, snapshot: Snapshot) -> str:
+        lines: list[str] = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(snapshot.get(name, []), key=lambda item: item[0]):
+                pairs = list(zip(metric.labelnames, labels, strict=True))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, value[:-2], strict=True):
+                        cumulative += count
+                        le = _format_labels(pairs + [("le", _format_value(bound))])
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = _format_labels(pairs + [("le", "+Inf")])
+                    lines.append(f"{name}_bucket{le} {value[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(value[-2])}")
+                    lines.append(f"{name}_count{_format_labels(pairs)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await to_thread.run_sync(self.flush)
+            except OSError as e:
+                logger.error(f"Error writing metrics snapshot: {e}")
+
+    def start(self) -> None:
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._flush_task is None:
+            return
+        self._flush_task.cancel()
+        await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        self.flush()
+
+
+def merge_snapshots(snapshots: Iterable[Snapshot]) -> Snapshot:
+    merged: dict[str, dict[tuple[str, ...], Any]] = {}
+    for snapshot in snapshots:
+        for name, items in snapshot.items():
+            series = merged.setdefault(name, {})
+            for labels, value in items:
+                key = tuple(labels)
+                current = series.get(key)
+                if current is None:
+                    series[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    series[key] = [a + b for a, b in zip(current, value, strict=True)]
+                else:
+                    series[key] = current + value
+    return {name: [[list(k), v] for k, v in series.items()] for name, series in merged.items()}
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: Sequence[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+metrics = MetricsRegistry(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS)
+
+http_requests_total = Counter(
+    metrics, "http_requests_total", "HTTP requests handled.", ["route", "method", "status"]
+)
+http_request_duration_seconds = Histogram(
+    metrics, "http_request_duration_seconds", "HTTP request latency.", ["route"]
+)
+http_request_db_statements = Histogram(
+    metrics,
+    "http_request_db_statements",
+    "SQL statements executed per HTTP request.",
+    ["route"],
+    buckets=STATEMENT_BUCKETS,
+)
+address_search_duration_seconds = Histogram(
+    metrics,
+    "address_search_duration_seconds",
+    "Address search latency by outcome (hit, miss or error).",
+    ["outcome"],
+)
+
+class MetricsMiddleware:
+    """
+    Records the latency, status and SQL statement count of every HTTP request.
+
+    Routes are labelled with their operation id (see custom_generate_unique_id)
+    so path parameters do not multiply series. A plain ASGI middleware keeps
+    streaming responses streaming and times them until their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                elapsed = time.perf_counter() - started
+                route = scope.get("route")
+                route_id = getattr(route, "unique_id", "") or getattr(route, "path", "unmatched")
+                http_requests_total.inc(route_id, scope["method"], str(status))
+                http_request_duration_seconds.observe(elapsed, route_id)
+                http_request_db_statements.observe(queries.statements, route_id)
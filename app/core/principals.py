@@ -0,0 +1,105 @@
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Protocol
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The columns of an authenticated user that most requests need.
+    """
+
+    id: uuid.UUID
+    email: str
+    full_name: str | None
+    is_active: bool
+    is_superuser: bool
+    is_organization: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            is_organization=user.is_organization,
+        )
+
+
+class PrincipalBackend(Protocol):
+    """
+    Storage for cached principals.
+
+    The default backend is private to each worker. A backend shared between
+    workers (Redis, memcached...) makes invalidations visible to all of them.
+    """
+
+    def get(self, key: str) -> Principal | None: ...
+
+    def set(self, key: str, value: Principal) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users, so get_current_user skips the DB.
+
+    Entries must be invalidated whenever a user is updated or deleted. With
+    the per-worker backend, other workers only see the change once their
+    entry expires, hence the short TTL.
+    """
+
+    def __init__(self, backend: PrincipalBackend) -> None:
+        self.backend = backend
+
+    def _detached_user(self, user_id: uuid.UUID | str) -> User | None:
+        principal = self.backend.get(str(user_id))
+        if principal is None:
+            return None
+        user = User(**asdict(principal))
+        make_transient_to_detached(user)
+        return user
+
+    def get(self, session: Session, user_id: uuid.UUID | str) -> User | None:
+        user = self._detached_user(user_id)
+        if user is None:
+            return None
+        # Attach the user to the session as if it had been loaded, the columns
+        # left out of the principal are loaded on first access
+        return session.merge(user, load=False)
+
+    async def aget(self, session: AsyncSession, user_id: uuid.UUID | str) -> User | None:
+        user = self._detached_user(user_id)
+        if user is None:
+            return None
+        return await session.merge(user, load=False)
+
+    def set(self, user: User) -> None:
+        self.backend.set(str(user.id), Principal.from_user(user))
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self.backend.delete(str(user_id))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+principal_cache = PrincipalCache(
+    TTLCache(
+        max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    )
+)
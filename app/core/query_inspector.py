@@ -0,0 +1,159 @@
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import Depends
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STARTED_INFO_KEY = "query_inspector_started"
+# Expanded IN lists and VALUES rows differ only by their number of parameters
+_PARAMETER_LIST = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class QueryStats:
+    budget: int | None = None
+    statements: int = 0
+    # Timings and shapes are only collected for the query inspector
+    inspect: bool = False
+    seconds: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+    slow: list[tuple[float, str]] = field(default_factory=list)
+
+    def problems(self) -> list[str]:
+        found = []
+        if self.statements > settings.QUERY_INSPECTOR_MAX_STATEMENTS:
+            found.append(f"{self.statements} statements")
+        for shape, count in self.shapes.most_common():
+            if count <= settings.QUERY_INSPECTOR_MAX_DUPLICATES:
+                break
+            found.append(f"{count} times: {shape[:200]}")
+        for seconds, shape in self.slow:
+            found.append(f"slow ({seconds * 1000:.0f} ms): {shape[:200]}")
+        if self.budget is not None and self.statements > self.budget:
+            found.append(f"over its budget of {self.budget} statements")
+        return found
+
+
+# Statements of the request being served, shared with the threads and
+# greenlets its handler runs on since they inherit the context
+_request_queries: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count the SQL statements run inside the block, for the metrics and the query inspector.
+    """
+    stats = QueryStats()
+    token = _request_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_queries.reset(token)
+
+
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _PARAMETER_LIST.sub("(...)", statement)).strip()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn: Any, *_args: Any) -> None:
+    stats = _request_queries.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    if stats.inspect:
+        conn.info.setdefault(_STARTED_INFO_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+    stats = _request_queries.get()
+    started = conn.info.get(_STARTED_INFO_KEY)
+    if stats is None or not stats.inspect or not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    shape = statement_shape(statement)
+    stats.seconds += seconds
+    stats.shapes[shape] += 1
+    if seconds * 1000 >= settings.QUERY_INSPECTOR_SLOW_STATEMENT_MS:
+        stats.slow.append((seconds, shape))
+
+
+def _set_budget(max_statements: int) -> Any:
+    def set_budget() -> None:
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.budget = max_statements
+
+    return set_budget
+
+
+def query_budget(max_statements: int) -> Any:
+    """
+    Route dependency declaring how many SQL statements a request may run.
+
+    Only checked with the query inspector enabled.
+    """
+    return Depends(_set_budget(max_statements))
+
+
+class QueryInspectorMiddleware:
+    """
+    Logs requests running too many, repeated or slow SQL statements.
+
+    Opt-in with QUERY_INSPECTOR_ENABLED for development and staging: repeated
+    statement shapes point at lazy loads or per-row writes in a loop (N+1).
+    With QUERY_INSPECTOR_ENFORCE_BUDGETS, a request over its route's
+    query_budget raises QueryBudgetExceeded, failing the test that sent it.
+    Statements are counted by the MetricsMiddleware wrapping it when present.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.QUERY_INSPECTOR_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        stats = _request_queries.get()
+        if stats is None:
+            with track_queries():
+                await self(scope, receive, send)
+            return
+        stats.inspect = True
+        await self.app(scope, receive, send)
+        problems = stats.problems()
+        if not problems:
+            return
+        route = getattr(scope.get("route"), "unique_id", None) or scope["path"]
+        message = (
+            f"{scope['method']} {route} ran {stats.statements} statements "
+            f"in {stats.seconds * 1000:.0f} ms: " + "; ".join(problems)
+        )
+        logger.warning(message)
+        if (
+            settings.QUERY_INSPECTOR_ENFORCE_BUDGETS
+            and stats.budget is not None
+            and stats.statements > stats.budget
+        ):
+            raise QueryBudgetExceeded(message)
@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from app.core.config import settings
+
+
+class RateLimitStore(Protocol):
+    """
+    Token bucket storage.
+
+    The default store is private to each worker, so every worker allows the
+    full rate. A store shared between workers (Redis...) enforces it globally.
+    """
+
+    def take(self, key: str, *, capacity: float, refill_per_second: float) -> float:
+        """
+        Take a token from the bucket of key, returning 0 or the seconds to wait for one.
+        """
+        ...
+
+    def reset(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryRateLimitStore:
+    """
+    Thread-safe in-process token buckets, the least recently used are dropped past max_entries.
+
+    A dropped bucket starts full again, which only lets its key retry earlier.
+    """
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max_entries
+        # key -> (tokens, monotonic time of the last update)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, *, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / refill_per_second
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """
+    Allow bursts of up to `attempts` per key, refilled evenly over `period_seconds`.
+    """
+
+    def __init__(self, store: RateLimitStore, *, attempts: int, period_seconds: float) -> None:
+        self.store = store
+        self.attempts = attempts
+        self.period_seconds = period_seconds
+
+    def hit(self, key: str) -> int:
+        """
+        Record an attempt for key, returning 0 when allowed or the Retry-After delay in seconds.
+        """
+        if self.attempts <= 0:
+            return 0
+        retry_after = self.store.take(
+            key, capacity=self.attempts, refill_per_second=self.attempts / self.period_seconds
+        )
+        return math.ceil(retry_after)
+
+    def reset(self, key: str) -> None:
+        self.store.reset(key)
+
+
+rate_limit_store = MemoryRateLimitStore(max_entries=settings.RATE_LIMIT_MAX_ENTRIES)
+login_ip_limiter = RateLimiter(
+    rate_limit_store,
+    attempts=settings.LOGIN_RATE_LIMIT_IP_ATTEMPTS,
+    period_seconds=settings.LOGIN_RATE_LIMIT_IP_PERIOD_SECONDS,
+)
+login_account_limiter = RateLimiter(
+    rate_limit_store,
+    attempts=settings.LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS,
+    period_seconds=settings.LOGIN_RATE_LIMIT_ACCOUNT_PERIOD_SECONDS,
+)
+login_account_total_limiter = RateLimiter(
+    rate_limit_store,
+    attempts=settings.LOGIN_RATE_LIMIT_ACCOUNT_TOTAL_ATTEMPTS,
+    period_seconds=settings.LOGIN_RATE_LIMIT_ACCOUNT_TOTAL_PERIOD_SECONDS,
+)
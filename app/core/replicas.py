@@ -0,0 +1,156 @@
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlmodel import create_engine
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.db_pool import engine_options
+
+# Cookie holding the wall clock time of the client's last committed write.
+# The client sends it back to whichever worker serves its next request.
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    async_engine: AsyncEngine
+    # Monotonic time before which the replica is skipped after a failed connection
+    down_until: float = field(default=0.0)
+
+
+class ReplicaRouter:
+    """
+    Picks a read replica for GET handlers, round-robin over the healthy ones.
+
+    A replica failing to hand out a connection is skipped for retry_seconds,
+    the next request after that tries it again. A client whose request
+    committed a write reads from the primary for sticky_seconds, so
+    replication lag never hides its own changes. The time of the write
+    travels in the LAST_WRITE_COOKIE cookie, so any worker sees it.
+
+    Clients authenticating with a bearer token from another origin, or
+    outside of a browser, may never send the cookie back. The worker that
+    committed their write also remembers the token subject, so their reads
+    served by that worker stick to the primary too. Reads served by another
+    worker only see the cookie, a store shared between workers would be
+    needed to cover them.
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[Replica],
+        *,
+        retry_seconds: float,
+        sticky_seconds: float,
+        sticky_max_entries: int,
+    ) -> None:
+        self.replicas = list(replicas)
+        self.retry_seconds = retry_seconds
+        self.sticky_seconds = sticky_seconds
+        self.sticky_max_entries = sticky_max_entries
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        # Token subject -> monotonic time of its last committed write, oldest first
+        self._writes: OrderedDict[str, float] = OrderedDict()
+
+    @classmethod
+    def from_urls(
+        cls,
+        urls: Sequence[str],
+        *,
+        retry_seconds: float,
+        sticky_seconds: float,
+        sticky_max_entries: int,
+    ) -> "ReplicaRouter":
+        replicas = [
+            Replica(
+                name=f"replica_{index}",
+                engine=create_engine(url, **engine_options(is_async=False)),
+                async_engine=create_async_engine(url, **engine_options(is_async=True)),
+            )
+            for index, url in enumerate(urls)
+        ]
+        return cls(
+            replicas,
+            retry_seconds=retry_seconds,
+            sticky_seconds=sticky_seconds,
+            sticky_max_entries=sticky_max_entries,
+        )
+
+    def candidates(self, cookies: Mapping[str, str], subject: str | None = None) -> list[Replica]:
+        """
+        Healthy replicas in the order to try them, empty when the primary must serve the read.
+        """
+        if not self.replicas or self._wrote_recently(cookies, subject):
+            return []
+        with self._lock:
+            start = next(self._next) % len(self.replicas)
+        now = time.monotonic()
+        rotated = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in rotated if replica.down_until <= now]
+
+    def mark_down(self, replica: Replica) -> None:
+        replica.down_until = time.monotonic() + self.retry_seconds
+
+    def track_writes(self, session: Session, response: Response, subject: str | None = None) -> None:
+        """
+        Set the last write cookie on response and remember subject whenever session commits.
+
+        Only the sessions of requests are tracked, those of the background
+        workers have no client to send reads to the primary.
+        """
+        if not self.replicas:
+            return
+
+        def after_commit(_session: Session) -> None:
+            response.set_cookie(
+                LAST_WRITE_COOKIE,
+                str(time.time()),
+                max_age=math.ceil(self.sticky_seconds),
+                httponly=True,
+                samesite="lax",
+            )
+            if subject is not None:
+                with self._lock:
+                    self._writes[subject] = time.monotonic()
+                    self._writes.move_to_end(subject)
+                    while len(self._writes) > self.sticky_max_entries:
+                        self._writes.popitem(last=False)
+
+        event.listen(session, "after_commit", after_commit)
+
+    def _wrote_recently(self, cookies: Mapping[str, str], subject: str | None) -> bool:
+        if subject is not None:
+            with self._lock:
+                written_at = self._writes.get(subject)
+            if written_at is not None and time.monotonic() - written_at < self.sticky_seconds:
+                return True
+        try:
+            last_write_at = float(cookies.get(LAST_WRITE_COOKIE, ""))
+        except ValueError:
+            return False
+        return time.time() - last_write_at < self.sticky_seconds
+
+    async def adispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+
+replica_router = ReplicaRouter.from_urls(
+    [str(url) for url in settings.READ_REPLICA_DATABASE_URIS],
+    retry_seconds=settings.READ_REPLICA_RETRY_SECONDS,
+    sticky_seconds=settings.READ_REPLICA_STICKY_SECONDS,
+    sticky_max_entries=settings.READ_REPLICA_STICKY_MAX_ENTRIES,
+)
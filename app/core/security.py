@@ -1,12 +1,61 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.models import PasswordHasherStats
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def build_pwd_context(
+    *,
+    scheme: str,
+    bcrypt_rounds: int,
+    argon2_time_cost: int,
+    argon2_memory_cost: int,
+    argon2_parallelism: int,
+) -> CryptContext:
+    """
+    Build the password hashing policy: new hashes use scheme with the given costs.
+
+    Hashes made with the other scheme or weaker costs still verify but report
+    needs_update, so they get rehashed on the next successful login.
+    """
+    schemes = ["bcrypt", "argon2"]
+    schemes.sort(key=lambda s: s != scheme)
+    context = CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+    # Raises MissingBackendError when the scheme's package is not installed,
+    # at startup rather than on every hash in the worker pool
+    context.handler(scheme).get_backend()
+    return context
+
+
+pwd_context = build_pwd_context(
+    scheme=settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
+
+T = TypeVar("T")
 
 
 ALGORITHM = "HS256"
@@ -19,9 +68,144 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Run inside the pool processes, so they must stay importable top-level functions
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def _verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when too many hash operations are already waiting for the pool.
+    """
+
+
+class PasswordHasher:
+    """
+    Runs password hashing in a size-limited process pool instead of on the request thread.
+
+    bcrypt holds the GIL for its whole ~250ms, so a burst of logins inline
+    would stall every other request of the worker. At most max_pending
+    operations may be queued or running: beyond that PasswordHasherBusy is
+    raised instead of letting the queue grow without bound. With workers=0
+    hashing runs inline, which is handy for scripts and tests.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that already runs threads can deadlock the children
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        started = time.monotonic()
+        future: Future[T]
+        try:
+            if self.workers <= 0:
+                future = Future()
+                future.set_result(fn(*args))
+            else:
+                future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._done(started)
+            raise
+        future.add_done_callback(lambda _: self._done(started))
+        return future
+
+    def _done(self, started: float) -> None:
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._total_seconds += elapsed
+            self._max_seconds = max(self._max_seconds, elapsed)
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash_password, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(_verify_password, plain_password, hashed_password).result()
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return self._submit(_verify_and_update_password, plain_password, hashed_password).result()
+
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash_password, password))
+
+    async def averify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit(_verify_password, plain_password, hashed_password)
+        )
+
+    async def averify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await asyncio.wrap_future(
+            self._submit(_verify_and_update_password, plain_password, hashed_password)
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def stats(self) -> PasswordHasherStats:
+        with self._lock:
+            return PasswordHasherStats(
+                workers=self.workers,
+                pending=self._pending,
+                completed=self._completed,
+                rejected=self._rejected,
+                average_seconds=self._total_seconds / self._completed if self._completed else 0.0,
+                max_seconds=self._max_seconds,
+            )
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hasher.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify a password, also returning a new hash when the stored one is outdated.
+    """
+    return password_hasher.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+
+async def averify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await password_hasher.averify_and_update(plain_password, hashed_password)
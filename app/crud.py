@@ -1,10 +1,28 @@
 import uuid
-from typing import Any
+from typing import Any, cast
 
-from sqlmodel import Session, select
+from sqlalchemy import CursorResult, delete, insert, update
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
-from app.models import DropOffPoint, DropOffPointCreate, User, UserCreate, UserUpdate
+from app.core.geo import geohash_for
+from app.core.principals import principal_cache
+from app.core.security import (
+    averify_and_update_password,
+    get_password_hash,
+    verify_and_update_password,
+)
+from app.models import (
+    GEOCODE_DONE,
+    GEOCODE_PENDING,
+    GEOCODE_SKIPPED,
+    DropOffPoint,
+    DropOffPointCreate,
+    MemberOf,
+    User,
+    UserCreate,
+    UserUpdate,
+)
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -27,6 +45,7 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
+    principal_cache.invalidate(db_user.id)
     session.refresh(db_user)
     return db_user
 
@@ -37,18 +56,100 @@ def get_user_by_email(*, session: Session, email: str) -> User | None:
     return session_user
 
 
+async def aget_user_by_email(*, session: AsyncSession, email: str) -> User | None:
+    statement = select(User).where(User.email == email)
+    return (await session.exec(statement)).first()
+
+
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # The stored hash predates the current hashing policy
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        session.commit()
+        session.refresh(db_user)
+    return db_user
+
+
+async def aauthenticate(*, session: AsyncSession, email: str, password: str) -> User | None:
+    db_user = await aget_user_by_email(session=session, email=email)
+    if not db_user:
+        return None
+    verified, new_hash = await averify_and_update_password(password, db_user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
     return db_user
 
 
 def create_drop_off_point(*, session: Session, drop_off_point_in: DropOffPointCreate, owner_id: uuid.UUID) -> DropOffPoint:
-    db_drop_off_point = DropOffPoint.model_validate(drop_off_point_in, update={"owner_id": owner_id})
+    # Coordinates are filled in later by the geocoding worker
+    geocode_status = GEOCODE_PENDING if drop_off_point_in.address else GEOCODE_SKIPPED
+    db_drop_off_point = DropOffPoint.model_validate(
+        drop_off_point_in,
+        update={
+            "owner_id": owner_id,
+            "geocode_status": geocode_status,
+            "geohash": geohash_for(drop_off_point_in.latitude, drop_off_point_in.longitude),
+        },
+    )
     session.add(db_drop_off_point)
     session.commit()
     session.refresh(db_drop_off_point)
     return db_drop_off_point
+
+
+def _initial_geocode_status(drop_off_point_in: DropOffPointCreate) -> str:
+    if not drop_off_point_in.address:
+        return GEOCODE_SKIPPED
+    if drop_off_point_in.latitude is not None and drop_off_point_in.longitude is not None:
+        return GEOCODE_DONE
+    return GEOCODE_PENDING
+
+
+def create_drop_off_points(*, session: Session, drop_off_points_in: list[DropOffPointCreate], owner_id: uuid.UUID) -> list[DropOffPoint]:
+    # Bulk callers geocode up front, only rows left without coordinates are queued
+    db_drop_off_points = [
+        DropOffPoint.model_validate(
+            drop_off_point_in,
+            update={
+                "owner_id": owner_id,
+                "geocode_status": _initial_geocode_status(drop_off_point_in),
+                "geohash": geohash_for(drop_off_point_in.latitude, drop_off_point_in.longitude),
+            },
+        )
+        for drop_off_point_in in drop_off_points_in
+    ]
+    # One multi-row INSERT per chunk, kept below Postgres' 65535 bind parameters limit
+    chunk_size = 1000
+    for i in range(0, len(db_drop_off_points), chunk_size):
+        rows = [db_obj.model_dump() for db_obj in db_drop_off_points[i : i + chunk_size]]
+        session.execute(insert(DropOffPoint).values(rows))
+    session.commit()
+    return db_drop_off_points
+
+
+def reassign_drop_off_points(*, session: Session, from_membership_id: uuid.UUID, to_membership_id: uuid.UUID | None) -> int:
+    # One UPDATE for all the points of the membership, whatever their number
+    result = session.execute(
+        update(DropOffPoint)
+        .where(col(DropOffPoint.responsible_id) == from_membership_id)
+        .values(responsible_id=to_membership_id)
+    )
+    return int(cast(CursorResult[Any], result).rowcount)
+
+
+def delete_membership(*, session: Session, membership_id: uuid.UUID) -> None:
+    # The points are unassigned first, the foreign key would delete them along
+    reassign_drop_off_points(session=session, from_membership_id=membership_id, to_membership_id=None)
+    session.execute(delete(MemberOf).where(col(MemberOf.id) == membership_id))
+    session.commit()
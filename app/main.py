@@ -1,10 +1,23 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.core.addok import addok_client
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.email_worker import email_worker
+from app.core.geocoding_worker import geocoding_worker
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.query_inspector import QueryInspectorMiddleware
+from app.core.replicas import replica_router
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.utils import load_email_templates
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,12 +27,42 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    metrics.start()
+    load_email_templates()
+    if settings.GEOCODING_WORKER_ENABLED:
+        geocoding_worker.start()
+    if settings.EMAIL_WORKER_ENABLED:
+        email_worker.start()
+    yield
+    await geocoding_worker.stop()
+    await email_worker.stop()
+    await addok_client.aclose()
+    password_hasher.shutdown()
+    # Async connections belong to the event loop that is ending
+    await async_engine.dispose()
+    await replica_router.adispose()
+    await metrics.stop()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(_request: Request, _exc: PasswordHasherBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many concurrent password operations, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -30,4 +73,17 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+app.add_middleware(QueryInspectorMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@app.get("/metrics", tags=["metrics"], include_in_schema=False)
+def read_metrics() -> PlainTextResponse:
+    """
+    Prometheus scrape endpoint, to be kept off the public network by the proxy.
+    """
+    return PlainTextResponse(
+        metrics.render(metrics.collect()), media_type="text/plain; version=0.0.4"
+    )
@@ -1,7 +1,9 @@
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Any, List, Optional
 import uuid
 
 from pydantic import EmailStr
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -64,6 +66,13 @@ class MemberOfBase(SQLModel):
 
 
 class MemberOf(MemberOfBase, table=True):
+    __table_args__ = (
+        # Membership lookups by member, covering the drop off point visibility join
+        Index("ix_memberof_member_id_is_pending_id", "member_id", "is_pending", "id"),
+        # One membership per organization and member, bulk invites rely on it
+        Index("ix_memberof_organization_id_member_id", "organization_id", "member_id", unique=True),
+    )
+
     organization: User = Relationship(
         sa_relationship_kwargs={"foreign_keys": "[MemberOf.organization_id]"},
         back_populates="organization_memberships"
@@ -82,7 +91,8 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 class MemberInfo(UserPublic):
@@ -91,8 +101,31 @@ class MemberInfo(UserPublic):
 
 class MembersResponse(SQLModel):
     data: list[MemberInfo]
+    count: int | None
+    next_cursor: str | None = None
+
+
+# Values of InvitationResult.status
+INVITATION_INVITED = "invited"
+INVITATION_ALREADY_MEMBER = "already_member"
+INVITATION_USER_NOT_FOUND = "user_not_found"
+
+
+class InvitationResult(SQLModel):
+    email: str
+    status: str
+    member: MemberInfo | None = None
+
+
+class InvitationResults(SQLModel):
+    data: list[InvitationResult]
+    count: int
+
+
+class ReassignmentResponse(SQLModel):
     count: int
 
+
 class InvitationsResponse(SQLModel):
     data: list[MemberOf]
     count: int
@@ -130,8 +163,39 @@ class DropOffPointUpdate(DropOffPointBase):
     title: str | None = Field(default=None, min_length=1, max_length=255)  # type: ignore
 
 
+# Values of DropOffPoint.geocode_status
+GEOCODE_PENDING = "pending"
+GEOCODE_DONE = "done"
+GEOCODE_FAILED = "failed"
+# Addok answered without a match, retrying would not change the answer
+GEOCODE_NOT_FOUND = "not_found"
+GEOCODE_SKIPPED = "skipped"
+
+
 # Database model, database table inferred from class name
 class DropOffPoint(DropOffPointBase, table=True):
+    __table_args__ = (
+        # Lets the geocoding worker find due rows without scanning the table
+        Index(
+            "ix_dropoffpoint_geocode_pending",
+            "geocode_next_attempt_at",
+            postgresql_where=text("geocode_status = 'pending'"),
+        ),
+        # text_pattern_ops lets `geohash LIKE 'prefix%'` use the index
+        Index(
+            "ix_dropoffpoint_geohash",
+            "geohash",
+            postgresql_ops={"geohash": "text_pattern_ops"},
+        ),
+        # The two access paths of the visibility filter: owned and responsible
+        Index("ix_dropoffpoint_owner_id_id", "owner_id", "id"),
+        Index(
+            "ix_dropoffpoint_responsible_id",
+            "responsible_id",
+            postgresql_where=text("responsible_id IS NOT NULL"),
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     title: str = Field(max_length=255)
     owner_id: uuid.UUID = Field(
@@ -145,6 +209,14 @@ class DropOffPoint(DropOffPointBase, table=True):
     latitude: float | None = Field(default=None)
     longitude: float | None = Field(default=None)
     is_done: bool | None = Field(default=False)
+    geocode_status: str = Field(default=GEOCODE_PENDING, max_length=16)
+    geocode_attempts: int = Field(default=0)
+    geocode_next_attempt_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # type: ignore
+    )
+    # Kept in sync with latitude/longitude, see app.core.geo.geohash_for
+    geohash: str | None = Field(default=None, max_length=12)
 
 
 # Properties to return via API, id is always required
@@ -152,11 +224,70 @@ class DropOffPointPublic(DropOffPointBase):
     id: uuid.UUID
     owner_id: uuid.UUID
     owner_full_name: str | None = None
+    geocode_status: str | None = None
+
+
+# Per-owner drop off point aggregates on geohash grids, one row per (precision, cell, owner).
+# Maintained incrementally by the dropoffpoint_grid database triggers, coordinate
+# sums are in units of 1 / app.core.geo.GRID_COORDINATE_SCALE degree.
+class DropOffPointGridCell(SQLModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_dropoffpointgridcell_precision_cell",
+            "precision",
+            "cell",
+            postgresql_ops={"cell": "text_pattern_ops"},
+        ),
+    )
+
+    precision: int = Field(primary_key=True)
+    cell: str = Field(primary_key=True, max_length=12)
+    owner_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    count: int = Field(default=0)
+    done_count: int = Field(default=0)
+    latitude_e7_sum: int = Field(default=0, sa_type=BigInteger)
+    longitude_e7_sum: int = Field(default=0, sa_type=BigInteger)
+
+
+class DropOffPointCluster(SQLModel):
+    geohash: str
+    latitude: float
+    longitude: float
+    count: int
+    done_count: int
+
+
+class DropOffPointClustersPublic(SQLModel):
+    data: list[DropOffPointCluster]
+    count: int
+
+
+# Values of DropOffPointDoneResult.status
+DONE_UPDATED = "updated"
+DONE_NOT_FOUND = "not_found"
+DONE_FORBIDDEN = "forbidden"
+
+
+# Properties to receive to mark many drop off points done or not done
+class DropOffPointsDoneUpdate(SQLModel):
+    ids: list[uuid.UUID]
+    is_done: bool
+
+
+class DropOffPointDoneResult(SQLModel):
+    id: uuid.UUID
+    status: str
+
+
+class DropOffPointDoneResults(SQLModel):
+    data: list[DropOffPointDoneResult]
+    count: int
 
 
 class DropOffPointsPublic(SQLModel):
     data: list[DropOffPointPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 
 # Generic message
@@ -214,4 +345,88 @@ class AddressResponse(SQLModel):
     attribution: Optional[str] = None
     licence: Optional[str] = None
     query: Optional[str] = None
-    limit: Optional[int] = None
\ No newline at end of file
+    limit: Optional[int] = None
+
+
+# Geocoding cache shared between workers, keyed by the normalized query
+class GeocodingCacheEntry(SQLModel, table=True):
+    query: str = Field(primary_key=True, max_length=512)
+    response: dict[str, Any] = Field(sa_column=Column(JSON, nullable=False))
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),  # type: ignore
+        index=True,
+    )
+
+
+class PasswordHasherStats(SQLModel):
+    workers: int
+    pending: int
+    completed: int
+    rejected: int
+    average_seconds: float
+    max_seconds: float
+
+
+class DatabasePoolStats(SQLModel):
+    name: str
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    checkouts: int = 0
+    timeouts: int = 0
+    average_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class GeocodingCacheStats(SQLModel):
+    local_hits: int
+    shared_hits: int
+    misses: int
+    evictions: int
+    size: int
+
+
+# Values of EmailOutbox.status
+EMAIL_PENDING = "pending"
+EMAIL_SENT = "sent"
+EMAIL_FAILED = "failed"
+
+
+# Outgoing emails, delivered by app.core.email_worker outside of the request path
+class EmailOutbox(SQLModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_emailoutbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        # Sent and failed emails, purged by creation date
+        Index(
+            "ix_emailoutbox_done_created_at",
+            "created_at",
+            postgresql_where=text("status <> 'pending'"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    email_to: str = Field(max_length=255)
+    subject: str
+    html_content: str
+    status: str = Field(default=EMAIL_PENDING, max_length=16)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # type: ignore
+    )
+    last_error: str | None = Field(default=None)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),  # type: ignore
+    )
+    sent_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # type: ignore
+    )
@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import settings
+from app.core.security import build_pwd_context
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Hashes timed by each process for every candidate cost
+SAMPLES = 3
+
+
+def _time_hashes(scheme: str, bcrypt_rounds: int, argon2_time_cost: int, argon2_memory_cost: int) -> list[float]:
+    pwd_context = build_pwd_context(
+        scheme=scheme,
+        bcrypt_rounds=bcrypt_rounds,
+        argon2_time_cost=argon2_time_cost,
+        argon2_memory_cost=argon2_memory_cost,
+        argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+    durations = []
+    for _ in range(SAMPLES):
+        started = time.perf_counter()
+        pwd_context.hash("calibration password")
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def _latency(
+    executor: ProcessPoolExecutor, concurrency: int, scheme: str, bcrypt_rounds: int, argon2_time_cost: int, argon2_memory_cost: int
+) -> float:
+    """
+    Median hash latency while concurrency processes hash at the same time, as during a login burst.
+    """
+    futures = [
+        executor.submit(_time_hashes, scheme, bcrypt_rounds, argon2_time_cost, argon2_memory_cost)
+        for _ in range(concurrency)
+    ]
+    return statistics.median(d for future in futures for d in future.result())
+
+
+def calibrate(*, scheme: str, target_seconds: float, concurrency: int, argon2_memory_cost: int) -> dict[str, int]:
+    """
+    Return the highest cost settings whose loaded hash latency stays under target_seconds.
+    """
+    if scheme == "bcrypt":
+        # 10 is the lowest cost still considered acceptable for bcrypt
+        candidates = [{"PASSWORD_BCRYPT_ROUNDS": rounds} for rounds in range(10, 17)]
+    else:
+        candidates = [
+            {"PASSWORD_ARGON2_TIME_COST": time_cost, "PASSWORD_ARGON2_MEMORY_COST": argon2_memory_cost}
+            for time_cost in range(1, 11)
+        ]
+    chosen = candidates[0]
+    with ProcessPoolExecutor(max_workers=concurrency) as executor:
+        for candidate in candidates:
+            latency = _latency(
+                executor,
+                concurrency,
+                scheme,
+                candidate.get("PASSWORD_BCRYPT_ROUNDS", settings.PASSWORD_BCRYPT_ROUNDS),
+                candidate.get("PASSWORD_ARGON2_TIME_COST", settings.PASSWORD_ARGON2_TIME_COST),
+                argon2_memory_cost,
+            )
+            logger.info(f"{candidate}: {latency * 1000:.0f}ms per hash")
+            if latency > target_seconds:
+                break
+            chosen = candidate
+    return chosen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark password hashing on this host and suggest cost settings."
+    )
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default=settings.PASSWORD_HASH_SCHEME)
+    parser.add_argument("--target-seconds", type=float, default=0.25, help="Target login hash latency")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Hashes running at once, defaults to the core count",
+    )
+    parser.add_argument("--argon2-memory-cost", type=int, default=settings.PASSWORD_ARGON2_MEMORY_COST, help="In KiB")
+    args = parser.parse_args()
+
+    logger.info(f"Calibrating {args.scheme} for {args.target_seconds}s with {args.concurrency} concurrent hashes")
+    chosen = calibrate(
+        scheme=args.scheme,
+        target_seconds=args.target_seconds,
+        concurrency=args.concurrency,
+        argon2_memory_cost=args.argon2_memory_cost,
+    )
+    print(f"PASSWORD_HASH_SCHEME={args.scheme}")
+    for name, value in chosen.items():
+        print(f"{name}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import uuid
+
+import httpx
+import pytest
 from fastapi.testclient import TestClient
 
+from app.core.addok import addok_client
 from app.core.config import settings
 
 
@@ -55,8 +60,50 @@ def test_search_address_success(client: TestClient) -> None:
         assert "oldcity" in properties
 
 
+def test_search_address_unreachable(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    # A fresh client is created on the mocked transport
+    monkeypatch.setattr(addok_client, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(addok_client, "_client", None)
+    monkeypatch.setattr(addok_client, "retry_backoff", 0)
+    response = client.get(
+        f"{settings.API_V1_STR}/address/search",
+        params={"query": f"unreachable {uuid.uuid4()}"},
+    )
+    assert response.status_code == 502
+    assert response.json()["detail"] == "Address search unavailable"
+
+
 def test_search_address_no_query(client: TestClient) -> None:
     response = client.get(
         f"{settings.API_V1_STR}/address/search",
     )
     assert response.status_code == 422  # Validation error for missing query parameter
+
+
+def test_read_cache_stats(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/address/cache-stats",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["local_hits"] >= 0
+    assert content["misses"] >= 0
+    assert content["size"] >= 0
+
+
+def test_read_cache_stats_normal_user(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/address/cache-stats",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 403
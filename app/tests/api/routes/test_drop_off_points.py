@@ -1,10 +1,20 @@
+import csv
+import io
+import json
 import uuid
 
+import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, col, delete, select, text
 
+from app import crud
+from app.api.routes.drop_off_points import _select_public_drop_off_points, _visible_to
 from app.core.config import settings
+from app.core.geo import CLUSTER_MAX_PRECISION, GRID_COORDINATE_SCALE, geohash_encode
+from app.models import DropOffPointCreate, DropOffPointGridCell, MemberOf, User
 from app.tests.utils.drop_off_point import create_random_drop_off_point
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import explain, record_statements
 
 
 def test_create_drop_off_point(
@@ -166,3 +176,390 @@ def test_delete_drop_off_point_not_enough_permissions(
     assert response.status_code == 400
     content = response.json()
     assert content["detail"] == "Not enough permissions"
+
+
+def test_create_drop_off_points_bulk(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    data = [
+        {"title": "Foo", "address": "123 Main St"},
+        {"title": "Bar", "address": "123 Main St"},
+        {"title": "Baz"},
+    ]
+    response = client.post(
+        f"{settings.API_V1_STR}/drop-off-points/bulk",
+        headers=superuser_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 3
+    assert [p["title"] for p in content["data"]] == ["Foo", "Bar", "Baz"]
+    assert content["data"][2]["latitude"] is None
+
+
+def test_import_drop_off_points_csv(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    csv_content = "title,description,address,is_done\nFoo,Fighters,123 Main St,\nBar,,,true\n"
+    response = client.post(
+        f"{settings.API_V1_STR}/drop-off-points/bulk/csv",
+        headers=superuser_token_headers,
+        files={"file": ("points.csv", csv_content, "text/csv")},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 2
+    assert content["data"][0]["description"] == "Fighters"
+    assert content["data"][0]["is_done"] is False
+    assert content["data"][1]["is_done"] is True
+
+
+def test_import_drop_off_points_csv_invalid_row(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    csv_content = "title,address\nFoo,123 Main St\n,456 Main St\n"
+    response = client.post(
+        f"{settings.API_V1_STR}/drop-off-points/bulk/csv",
+        headers=superuser_token_headers,
+        files={"file": ("points.csv", csv_content, "text/csv")},
+    )
+    assert response.status_code == 422
+    assert "line 3" in response.json()["detail"]
+
+
+def test_read_drop_off_points_does_not_lazy_load_owners(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(5):
+        create_random_drop_off_point(db)
+    # Caches the authenticated principal, so the recorded request is only the page
+    client.get(f"{settings.API_V1_STR}/users/me", headers=superuser_token_headers)
+    with record_statements() as statements:
+        response = client.get(
+            f"{settings.API_V1_STR}/drop-off-points/",
+            headers=superuser_token_headers,
+            params={"limit": 5},
+        )
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 5
+    # The page with its owners joined in, and the count: any lazy load adds to it
+    assert len(statements) == 2
+    assert len([s for s in statements if 'JOIN "user"' in s]) == 1
+
+
+def test_read_drop_off_points_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        create_random_drop_off_point(db)
+    first = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/",
+        headers=superuser_token_headers,
+        params={"limit": 2, "count_mode": "estimated"},
+    ).json()
+    assert len(first["data"]) == 2
+    assert first["count"] is not None
+    assert first["next_cursor"]
+
+    second = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/",
+        headers=superuser_token_headers,
+        params={"limit": 2, "cursor": first["next_cursor"]},
+    ).json()
+    first_ids = {p["id"] for p in first["data"]}
+    assert second["data"]
+    assert not first_ids & {p["id"] for p in second["data"]}
+    assert max(first_ids) < min(p["id"] for p in second["data"])
+
+
+def test_read_nearby_and_bbox_drop_off_points(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    owner = create_random_user(db)
+    # Around Tahiti, far from the points created by other tests
+    coordinates = [(-17.535, -149.569), (-17.536, -149.570), (-17.600, -149.569)]
+    points = [
+        crud.create_drop_off_point(
+            session=db,
+            drop_off_point_in=DropOffPointCreate(title="Point", latitude=latitude, longitude=longitude),
+            owner_id=owner.id,
+        )
+        for latitude, longitude in coordinates
+    ]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/nearby",
+        headers=superuser_token_headers,
+        params={"lat": -17.535, "lon": -149.569, "radius": 500},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [p["id"] for p in content["data"]] == [str(points[0].id), str(points[1].id)]
+    assert content["count"] == 2
+
+    # The count covers the whole radius, the page is cut by the limit
+    response = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/nearby",
+        headers=superuser_token_headers,
+        params={"lat": -17.535, "lon": -149.569, "radius": 10_000, "limit": 1},
+    )
+    content = response.json()
+    assert [p["id"] for p in content["data"]] == [str(points[0].id)]
+    assert content["count"] == 3
+
+    response = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/bbox",
+        headers=superuser_token_headers,
+        params={"min_lat": -17.61, "min_lon": -149.58, "max_lat": -17.53, "max_lon": -149.56},
+    )
+    assert response.status_code == 200
+    assert {p["id"] for p in response.json()["data"]} == {str(p.id) for p in points}
+
+
+def test_read_drop_off_point_clusters(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    owner = create_random_user(db)
+    # Around Reunion island, far from the points created by other tests
+    coordinates = [(-21.115, 55.536), (-21.116, 55.537), (-21.340, 55.477)]
+    points = [
+        crud.create_drop_off_point(
+            session=db,
+            drop_off_point_in=DropOffPointCreate(title="Point", latitude=latitude, longitude=longitude),
+            owner_id=owner.id,
+        )
+        for latitude, longitude in coordinates
+    ]
+    params = {"zoom": 12, "min_lat": -21.40, "min_lon": 55.20, "max_lat": -20.85, "max_lon": 55.85}
+
+    response = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/clusters",
+        headers=superuser_token_headers,
+        params=params,
+    )
+    assert response.status_code == 200
+    clusters = response.json()["data"]
+    assert sorted(c["count"] for c in clusters) == [1, 2]
+    assert sum(c["done_count"] for c in clusters) == 0
+
+    # Flipping is_done and deleting a point update the grid incrementally
+    client.post(
+        f"{settings.API_V1_STR}/drop-off-points/{points[0].id}/done",
+        headers=superuser_token_headers,
+        params={"is_done": True},
+    )
+    client.delete(
+        f"{settings.API_V1_STR}/drop-off-points/{points[2].id}",
+        headers=superuser_token_headers,
+    )
+    clusters = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/clusters",
+        headers=superuser_token_headers,
+        params=params,
+    ).json()["data"]
+    assert [(c["count"], c["done_count"]) for c in clusters] == [(2, 1)]
+    assert abs(clusters[0]["latitude"] - -21.1155) < 1e-6
+
+
+def test_read_drop_off_point_clusters_inside_view(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    owner = create_random_user(db)
+    # The last point is under a covering prefix of the view but outside of it
+    coordinates = [(-21.115, 55.536), (-21.116, 55.537), (-21.150, 55.580), (-21.250, 55.550)]
+    for latitude, longitude in coordinates:
+        crud.create_drop_off_point(
+            session=db,
+            drop_off_point_in=DropOffPointCreate(title="Point", latitude=latitude, longitude=longitude),
+            owner_id=owner.id,
+        )
+    params = {"zoom": 12, "min_lat": -21.2, "min_lon": 55.5, "max_lat": -21.0, "max_lon": 55.6}
+
+    clusters = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/clusters",
+        headers=superuser_token_headers,
+        params=params,
+    ).json()["data"]
+    assert geohash_encode(-21.250, 55.550, 5) not in {c["geohash"] for c in clusters}
+    assert all(
+        params["min_lat"] <= c["latitude"] <= params["max_lat"]
+        and params["min_lon"] <= c["longitude"] <= params["max_lon"]
+        for c in clusters
+    )
+
+    # Other users only aggregate the points they own or are responsible for
+    clusters = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/clusters",
+        headers=normal_user_token_headers,
+        params=params,
+    ).json()["data"]
+    assert geohash_encode(-21.115, 55.536, 5) not in {c["geohash"] for c in clusters}
+
+    # Past the cap only the largest clusters are returned
+    monkeypatch.setattr(settings, "DROP_OFF_POINT_CLUSTERS_MAX", 1)
+    clusters = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/clusters",
+        headers=superuser_token_headers,
+        params=params,
+    ).json()["data"]
+    assert [c["geohash"] for c in clusters] == [geohash_encode(-21.115, 55.536, 5)]
+    assert clusters[0]["count"] >= 2
+
+
+def test_drop_off_point_grid_cells_follow_multi_row_changes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    owner = create_random_user(db)
+    coordinates = [(-21.115, 55.536), (-21.116, 55.537), (-21.340, 55.477)]
+    points = [
+        crud.create_drop_off_point(
+            session=db,
+            drop_off_point_in=DropOffPointCreate(title="Point", latitude=latitude, longitude=longitude),
+            owner_id=owner.id,
+        )
+        for latitude, longitude in coordinates
+    ]
+
+    def grid_cells() -> list[DropOffPointGridCell]:
+        db.expire_all()
+        return list(
+            db.exec(select(DropOffPointGridCell).where(DropOffPointGridCell.owner_id == owner.id)).all()
+        )
+
+    cells = grid_cells()
+    # The migration keeps its own copy of the maximum precision
+    assert {cell.precision for cell in cells} == set(range(1, CLUSTER_MAX_PRECISION + 1))
+    top = next(cell for cell in cells if cell.precision == 1)
+    assert top.count == 3
+    assert top.latitude_e7_sum == round(sum(lat for lat, _ in coordinates) * GRID_COORDINATE_SCALE)
+
+    # One UPDATE over several points
+    response = client.post(
+        f"{settings.API_V1_STR}/drop-off-points/done",
+        headers=superuser_token_headers,
+        json={"ids": [str(point.id) for point in points], "is_done": True},
+    )
+    assert response.status_code == 200
+    assert all(cell.done_count == cell.count for cell in grid_cells())
+
+    # Cells left empty are deleted rather than kept with a zero count
+    client.delete(f"{settings.API_V1_STR}/drop-off-points/{points[2].id}", headers=superuser_token_headers)
+    cells = grid_cells()
+    assert all(cell.count > 0 for cell in cells)
+    assert next(cell for cell in cells if cell.precision == 1).latitude_e7_sum == round(
+        -21.115 * GRID_COORDINATE_SCALE
+    ) + round(-21.116 * GRID_COORDINATE_SCALE)
+
+    # Points deleted through the owner's foreign key take the owner's cells with them
+    db.execute(delete(User).where(col(User.id) == owner.id))
+    db.commit()
+    assert grid_cells() == []
+
+
+def test_export_drop_off_points(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    own = crud.create_drop_off_point(
+        session=db, drop_off_point_in=DropOffPointCreate(title="Mine"), owner_id=user.id
+    )
+    other = create_random_drop_off_point(db)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/export",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    ids = {json.loads(line)["id"] for line in response.text.splitlines()}
+    assert str(own.id) in ids
+    assert str(other.id) not in ids
+
+    response = client.get(
+        f"{settings.API_V1_STR}/drop-off-points/export",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert str(own.id) in {row["id"] for row in rows}
+    assert str(other.id) not in {row["id"] for row in rows}
+
+
+def test_read_drop_off_points_visibility_uses_indexes(db: Session) -> None:
+    organization = create_random_user(db)
+    member = create_random_user(db)
+    membership = MemberOf(organization_id=organization.id, member_id=member.id, is_pending=False)
+    db.add(membership)
+    db.commit()
+    crud.create_drop_off_point(
+        session=db,
+        drop_off_point_in=DropOffPointCreate(title="Point", responsible_id=membership.id),
+        owner_id=organization.id,
+    )
+
+    # Realistic row counts and statistics, rolled back by explain
+    db.execute(text("""
+        INSERT INTO "user" (id, email, hashed_password, is_active, is_superuser, is_organization)
+        SELECT gen_random_uuid(), 'visibility-' || i || '@example.com', '', true, false, false
+        FROM generate_series(1, 2000) AS i
+    """))
+    db.execute(
+        text("""
+            INSERT INTO memberof (id, organization_id, member_id, is_pending)
+            SELECT gen_random_uuid(), :organization_id, id, false
+            FROM "user" WHERE email LIKE 'visibility-%'
+        """),
+        {"organization_id": organization.id},
+    )
+    db.execute(text("""
+        INSERT INTO dropoffpoint (id, title, owner_id, responsible_id, is_done, geocode_status, geocode_attempts)
+        SELECT gen_random_uuid(), 'Point', u.id, m.id, false, 'skipped', 0
+        FROM "user" AS u JOIN memberof AS m ON m.member_id = u.id, generate_series(1, 10)
+        WHERE u.email LIKE 'visibility-%'
+    """))
+    db.execute(text('ANALYZE "user", memberof, dropoffpoint'))
+
+    plan = explain(db, _select_public_drop_off_points().where(_visible_to(member)))
+    assert "Seq Scan on dropoffpoint" not in plan
+    assert "Seq Scan on memberof" not in plan
+
+
+def test_set_drop_off_points_done_in_bulk(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user
+    organization = create_random_user(db)
+    membership = MemberOf(organization_id=organization.id, member_id=user.id, is_pending=False)
+    db.add(membership)
+    db.commit()
+    responsible_for = crud.create_drop_off_point(
+        session=db,
+        drop_off_point_in=DropOffPointCreate(title="Point", responsible_id=membership.id),
+        owner_id=organization.id,
+    )
+    other = create_random_drop_off_point(db)
+    unknown_id = uuid.uuid4()
+
+    response = client.post(
+        f"{settings.API_V1_STR}/drop-off-points/done",
+        headers=normal_user_token_headers,
+        json={"ids": [str(responsible_for.id), str(other.id), str(unknown_id)], "is_done": True},
+    )
+    assert response.status_code == 200
+    assert [(r["id"], r["status"]) for r in response.json()["data"]] == [
+        (str(responsible_for.id), "updated"),
+        (str(other.id), "forbidden"),
+        (str(unknown_id), "not_found"),
+    ]
+    db.refresh(responsible_for)
+    db.refresh(other)
+    assert responsible_for.is_done is True
+    assert other.is_done is False
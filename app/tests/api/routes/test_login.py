@@ -33,6 +33,70 @@ def test_get_access_token_incorrect_password(client: TestClient) -> None:
     assert r.status_code == 400
 
 
+def test_get_access_token_throttled(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    for _ in range(settings.LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS):
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+        assert r.status_code == 400
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+
+
+def test_get_access_token_account_throttled_per_client_ip(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    with patch("app.core.config.settings.CLIENT_IP_HEADER", "X-Forwarded-For"):
+        for _ in range(settings.LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS + 1):
+            r = client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data=login_data,
+                headers={"X-Forwarded-For": "203.0.113.7, 198.51.100.1"},
+            )
+        assert r.status_code == 429
+        # The proxy appended another client address
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data=login_data,
+            headers={"X-Forwarded-For": "203.0.113.7, 198.51.100.2"},
+        )
+        assert r.status_code == 400
+
+
+def test_get_access_token_account_throttled_across_client_ips(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    with (
+        patch("app.core.config.settings.CLIENT_IP_HEADER", "X-Forwarded-For"),
+        patch("app.core.rate_limit.login_account_total_limiter.attempts", 3),
+    ):
+        # One attempt per IP stays far below the limit per account and IP
+        statuses = [
+            client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data=login_data,
+                headers={"X-Forwarded-For": f"203.0.113.{i}"},
+            ).status_code
+            for i in range(1, 5)
+        ]
+        assert statuses == [400, 400, 400, 429]
+        # Other accounts are not affected
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data={"username": random_email(), "password": "incorrect"},
+            headers={"X-Forwarded-For": "203.0.113.5"},
+        )
+        assert r.status_code == 400
+
+
+def test_get_access_token_ip_throttled_does_not_charge_account(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    with patch("app.core.rate_limit.login_ip_limiter.hit", return_value=30):
+        for _ in range(settings.LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS + 1):
+            r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+            assert r.status_code == 429
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 400
+
+
 def test_use_access_token(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
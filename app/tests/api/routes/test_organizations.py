@@ -1,7 +1,9 @@
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, col, select
 
+from app import crud
 from app.core.config import settings
+from app.models import DropOffPoint, DropOffPointCreate, MemberOf
 from app.tests.utils.user import create_random_organization, create_random_user, authentication_token_from_email
 from app.tests.utils.utils import random_email
 
@@ -75,6 +77,46 @@ def test_invite_existing_member(
     assert r.status_code == 400
 
 
+def test_invite_users_to_organization_in_bulk(
+    client: TestClient, db: Session
+) -> None:
+    org = create_random_organization(db)
+    org_headers = authentication_token_from_email(
+        client=client, email=org.email, db=db
+    )
+    member = create_random_user(db)
+    new_user = create_random_user(db)
+    unknown_email = random_email()
+    r = client.post(
+        f"{settings.API_V1_STR}/organizations/invite",
+        headers=org_headers,
+        params={"email": member.email}
+    )
+    assert r.status_code == 200
+
+    r = client.post(
+        f"{settings.API_V1_STR}/organizations/invite/bulk",
+        headers=org_headers,
+        json=[new_user.email, member.email, unknown_email, new_user.email]
+    )
+    assert r.status_code == 200
+    response = r.json()
+    assert response["count"] == 3
+    assert [(result["email"], result["status"]) for result in response["data"]] == [
+        (new_user.email, "invited"),
+        (member.email, "already_member"),
+        (unknown_email, "user_not_found"),
+    ]
+    assert response["data"][0]["member"]["is_pending"] is True
+    assert response["data"][2]["member"] is None
+
+    r = client.get(
+        f"{settings.API_V1_STR}/organizations/members",
+        headers=org_headers
+    )
+    assert r.json()["count"] == 2
+
+
 def test_get_members(
     client: TestClient, db: Session
 ) -> None:
@@ -168,3 +210,50 @@ def test_delete_nonexistent_member(
         headers=org_headers
     )
     assert r.status_code == 404
+
+
+def test_reassign_then_delete_member(
+    client: TestClient, db: Session
+) -> None:
+    org = create_random_organization(db)
+    org_headers = authentication_token_from_email(
+        client=client, email=org.email, db=db
+    )
+    leaving, staying = (
+        MemberOf(organization_id=org.id, member_id=create_random_user(db).id, is_pending=False)
+        for _ in range(2)
+    )
+    db.add_all([leaving, staying])
+    db.commit()
+    points = crud.create_drop_off_points(
+        session=db,
+        drop_off_points_in=[DropOffPointCreate(title=f"Point {i}", responsible_id=leaving.id) for i in range(3)],
+        owner_id=org.id,
+    )
+    point_ids = [point.id for point in points]
+
+    r = client.post(
+        f"{settings.API_V1_STR}/organizations/members/{leaving.id}/reassign",
+        headers=org_headers,
+        params={"to_member_id": str(staying.id)}
+    )
+    assert r.status_code == 200
+    assert r.json() == {"count": 3}
+
+    # The points outlive the membership they are assigned to, unassigned
+    r = client.delete(
+        f"{settings.API_V1_STR}/organizations/members/{staying.id}",
+        headers=org_headers
+    )
+    assert r.status_code == 200
+    responsible_ids = db.exec(
+        select(DropOffPoint.responsible_id).where(col(DropOffPoint.id).in_(point_ids))
+    ).all()
+    assert responsible_ids == [None, None, None]
+
+    r = client.post(
+        f"{settings.API_V1_STR}/organizations/members/{leaving.id}/reassign",
+        headers=org_headers,
+        params={"to_member_id": str(staying.id)}
+    )
+    assert r.status_code == 404
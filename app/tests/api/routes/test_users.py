@@ -2,13 +2,13 @@ import uuid
 from unittest.mock import patch
 
 from fastapi.testclient import TestClient
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select
 
 from app import crud
 from app.core.config import settings
 from app.core.security import verify_password
 from app.models import User, UserCreate
-from app.tests.utils.utils import random_email, random_lower_string
+from app.tests.utils.utils import random_email, random_lower_string, record_statements
 
 
 def test_get_users_superuser_me(
@@ -168,6 +168,43 @@ def test_retrieve_users(
         assert "email" in drop_off_point
 
 
+def test_retrieve_users_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        user_in = UserCreate(email=random_email(), password=random_lower_string())
+        crud.create_user(session=db, user_create=user_in)
+
+    ids: list[str] = []
+    params: dict[str, str | int] = {"limit": 2, "count_mode": "none"}
+    while True:
+        r = client.get(
+            f"{settings.API_V1_STR}/users/", headers=superuser_token_headers, params=params
+        )
+        assert r.status_code == 200
+        page = r.json()
+        assert page["count"] is None
+        ids += [user["id"] for user in page["data"]]
+        if not page["next_cursor"]:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert len(ids) == len(set(ids))
+    assert len(ids) == db.exec(select(func.count()).select_from(User)).one()
+
+
+def test_retrieve_users_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
+
+
 def test_update_user_me(
     client: TestClient, normal_user_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -191,6 +228,32 @@ def test_update_user_me(
     assert user_db.full_name == full_name
 
 
+def test_read_user_me_uses_principal_cache(client: TestClient, db: Session) -> None:
+    username = random_email()
+    password = random_lower_string()
+    crud.create_user(session=db, user_create=UserCreate(email=username, password=password))
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": username, "password": password},
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    with record_statements() as statements:
+        r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["email"] == username
+    assert not [s for s in statements if 'FROM "user"' in s]
+
+    # Updates invalidate the cached principal
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me", headers=headers, json={"full_name": "Cached Name"}
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.json()["full_name"] == "Cached Name"
+
+
 def test_update_password_me(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
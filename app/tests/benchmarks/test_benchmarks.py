@@ -0,0 +1,65 @@
+import asyncio
+import random
+
+import httpx
+from sqlmodel import Session, col, func, select
+
+from app.benchmarks.addok_stub import coordinates_for, create_app
+from app.benchmarks.population import Population, user_email
+from app.benchmarks.run import Recorder, percentile, summarize
+from app.benchmarks.seed import reset, seed
+from app.core.addok import AddokClient
+from app.models import DropOffPoint, MemberOf, User
+
+
+def test_percentile_and_summary() -> None:
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) == 0
+
+    recorder = Recorder(latencies=[0.01, 0.02, 0.03, 0.04], errors=1)
+    summary = summarize(recorder, elapsed=2)
+    assert summary["rps"] == 2
+    assert summary["p50_ms"] == 20
+    assert summary["p99_ms"] == 40
+
+
+def test_addok_stub_speaks_addok() -> None:
+    client = AddokClient(
+        base_url="http://addok",
+        timeout=5,
+        connect_timeout=5,
+        max_connections=1,
+        max_concurrency=1,
+        max_retries=0,
+        retry_backoff=0,
+        transport=httpx.ASGITransport(app=create_app()),
+    )
+    response = asyncio.run(client.search("1 rue de Rivoli"))
+    assert response.features
+    assert response.features[0].geometry
+    assert tuple(response.features[0].geometry.coordinates) == coordinates_for("1 rue de Rivoli")
+    results = asyncio.run(client.search_csv(["a", "b"]))
+    assert [tuple(r.geometry.coordinates) for r in results if r and r.geometry] == [
+        coordinates_for("a"),
+        coordinates_for("b"),
+    ]
+
+
+def test_seed_and_reset(db: Session) -> None:
+    population = Population(drop_off_points=50)
+    seed(db, population, rng=random.Random(0))
+    bench_users = select(User.id).where(col(User.email).like("bench-%@example.com"))
+    try:
+        assert db.exec(select(func.count()).select_from(bench_users.subquery())).one() == (
+            population.users + population.organizations
+        )
+        assert db.exec(
+            select(func.count()).where(col(DropOffPoint.owner_id).in_(bench_users))
+        ).one() == 50
+        member = db.exec(select(User).where(User.email == user_email(2))).one()
+        assert db.exec(select(MemberOf).where(MemberOf.member_id == member.id)).all()
+    finally:
+        reset(db)
+    assert db.exec(select(func.count()).select_from(bench_users.subquery())).one() == 0
@@ -6,8 +6,9 @@ from sqlmodel import Session, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.core.rate_limit import rate_limit_store
 from app.main import app
-from app.models import DropOffPoint, MemberOf, User, UserCreate
+from app.models import DropOffPoint, EmailOutbox, MemberOf, User, UserCreate
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 from app import crud
@@ -19,11 +20,11 @@ def db() -> Generator[Session, None, None]:
         init_db(session)
         # Nettoyage avant chaque test
         statement = delete(DropOffPoint)
-        session.exec(statement)
+        session.execute(statement)
         statement = delete(MemberOf)
-        session.exec(statement)
+        session.execute(statement)
         statement = delete(User)
-        session.exec(statement)
+        session.execute(statement)
         session.commit()
 
         # Création du superuser
@@ -38,15 +39,40 @@ def db() -> Generator[Session, None, None]:
 
         yield session
         # Nettoyage après chaque test
+        statement = delete(EmailOutbox)
+        session.execute(statement)
         statement = delete(DropOffPoint)
-        session.exec(statement)
+        session.execute(statement)
         statement = delete(MemberOf)
-        session.exec(statement)
+        session.execute(statement)
         statement = delete(User)
-        session.exec(statement)
+        session.execute(statement)
         session.commit()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def enforce_query_budgets() -> Generator[None, None, None]:
+    # Requests over their route's query_budget fail the test that sent them
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "QUERY_INSPECTOR_ENABLED", True)
+        mp.setattr(settings, "QUERY_INSPECTOR_ENFORCE_BUDGETS", True)
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disable_email_worker() -> Generator[None, None, None]:
+    # Queued emails stay in the outbox, tests drive EmailWorker themselves
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "EMAIL_WORKER_ENABLED", False)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits() -> None:
+    # All test logins come from the same client, each test starts with full buckets
+    rate_limit_store.clear()
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
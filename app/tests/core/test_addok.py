@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.addok import AddokClient, AddokError
+
+
+def _client(handler: httpx.MockTransport) -> AddokClient:
+    return AddokClient(
+        base_url="http://addok.test",
+        timeout=1.0,
+        connect_timeout=1.0,
+        max_connections=2,
+        max_concurrency=2,
+        max_retries=2,
+        retry_backoff=0,
+        transport=handler,
+    )
+
+
+def test_search_encodes_query() -> None:
+    seen: list[httpx.URL] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url)
+        return httpx.Response(200, json={"type": "FeatureCollection", "features": []})
+
+    client = _client(httpx.MockTransport(handler))
+    response = asyncio.run(client.search("12 rue de l'Église & co"))
+    assert response.features == []
+    assert seen[0].params["q"] == "12 rue de l'Église & co"
+
+
+def test_search_retries_server_errors() -> None:
+    calls = 0
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"features": []})
+
+    client = _client(httpx.MockTransport(handler))
+    asyncio.run(client.search("paris"))
+    assert calls == 3
+
+
+def test_search_does_not_retry_client_errors() -> None:
+    calls = 0
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(400, json={"detail": "q must be at least 3 chars"})
+
+    client = _client(httpx.MockTransport(handler))
+    with pytest.raises(AddokError) as exc_info:
+        asyncio.run(client.search("a"))
+    assert exc_info.value.status_code == 400
+    assert calls == 1
+
+
+def test_search_csv_keeps_order_and_misses() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/search/csv/"
+        return httpx.Response(
+            200,
+            text=(
+                "q,latitude,longitude,result_label,result_score\r\n"
+                "paris,48.85,2.35,Paris,0.96\r\n"
+                "nowhere,,,,\r\n"
+            ),
+        )
+
+    client = _client(httpx.MockTransport(handler))
+    feature, missing = asyncio.run(client.search_csv(["paris", "nowhere"]))
+    assert feature and feature.geometry and feature.properties
+    assert feature.geometry.coordinates == [2.35, 48.85]
+    assert feature.properties.label == "Paris"
+    assert feature.properties.score == 0.96
+    assert missing is None
+
+
+def test_search_reports_unreachable_addok() -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = _client(httpx.MockTransport(handler))
+    with pytest.raises(AddokError) as exc_info:
+        asyncio.run(client.search("paris"))
+    assert exc_info.value.status_code is None
+    assert isinstance(exc_info.value.__cause__, httpx.ConnectError)
+    assert calls == 3
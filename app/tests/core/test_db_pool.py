@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, engine_options, pool_stats
+
+
+def test_pool_stats_tracks_checkouts_and_timeouts() -> None:
+    engine = create_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI),
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            stats = pool_stats("test", engine)
+            assert stats.checked_out == 1
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        stats = pool_stats("test", engine)
+    finally:
+        engine.dispose()
+    assert stats.pool_class == "InstrumentedQueuePool"
+    assert stats.size == 1
+    assert stats.checked_out == 0
+    assert stats.checkouts == 1
+    assert stats.timeouts == 1
+
+
+def test_engine_options_pgbouncer(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    options = engine_options(is_async=True)
+    assert options["connect_args"] == {"prepare_threshold": None}
+    assert "pool_size" not in options
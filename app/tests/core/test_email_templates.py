@@ -0,0 +1,11 @@
+from app.utils import email_templates, generate_test_email, load_email_templates
+
+
+def test_email_templates_compiled_once() -> None:
+    load_email_templates()
+    template = email_templates.get_template("test_email.html")
+    assert email_templates.get_template("test_email.html") is template
+
+    email_data = generate_test_email(email_to="someone@example.com")
+    assert "someone@example.com" in email_data.html_content
+    assert email_templates.get_template("test_email.html") is template
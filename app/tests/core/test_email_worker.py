@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from sqlmodel import Session, delete, select
+
+from app.core.email_worker import EmailWorker, SMTPConnection
+from app.models import EMAIL_FAILED, EMAIL_PENDING, EMAIL_SENT, EmailOutbox
+from app.tests.utils.smtp import SMTPStandIn, smtp_stand_in
+
+
+def _worker(server: SMTPStandIn) -> EmailWorker:
+    return EmailWorker(
+        connection_factory=partial(
+            SMTPConnection,
+            host=server.host,
+            port=server.port,
+            tls=False,
+            ssl=False,
+            user=None,
+            password=None,
+            timeout=5,
+            idle_seconds=30,
+        ),
+        concurrency=1,
+        batch_size=10,
+        poll_seconds=30,
+        lease_seconds=300,
+        max_attempts=3,
+        retry_backoff_seconds=60,
+        retention_days=30,
+        purge_interval_seconds=3600,
+    )
+
+
+def _queue(db: Session, count: int) -> list[EmailOutbox]:
+    db.execute(delete(EmailOutbox))
+    emails = [
+        EmailOutbox(email_to=f"to{i}@example.com", subject=f"Subject {i}", html_content="<p>Hi</p>")
+        for i in range(count)
+    ]
+    db.add_all(emails)
+    db.commit()
+    return emails
+
+
+def test_email_worker_sends_batch_over_one_connection(db: Session) -> None:
+    _queue(db, 3)
+    with smtp_stand_in() as server:
+        worker = _worker(server)
+        connection = worker.connection_factory()
+        assert asyncio.run(worker.run_once(connection)) == 3
+        _queue(db, 2)
+        assert asyncio.run(worker.run_once(connection)) == 2
+        connection.close()
+
+    assert server.connections == 1
+    assert len(server.messages) == 5
+    assert server.messages[0][1] == ["to0@example.com"]
+    assert "Subject: Subject 0" in server.messages[0][2]
+    sent = db.exec(select(EmailOutbox).execution_options(populate_existing=True)).all()
+    assert [(email.status, email.html_content) for email in sent] == [(EMAIL_SENT, ""), (EMAIL_SENT, "")]
+    db.execute(delete(EmailOutbox))
+    db.commit()
+
+
+def test_email_worker_retries_with_backoff(db: Session) -> None:
+    (email,) = _queue(db, 1)
+    with smtp_stand_in() as server:
+        server.rcpt_reply = "450 Mailbox busy"
+        worker = _worker(server)
+        connection = worker.connection_factory()
+        assert asyncio.run(worker.run_once(connection)) == 1
+        # Backed off, not due again yet
+        assert asyncio.run(worker.run_once(connection)) == 0
+        connection.close()
+
+    db.refresh(email)
+    assert email.status == EMAIL_PENDING
+    assert email.attempts == 1
+    assert email.last_error and "450" in email.last_error
+    assert email.next_attempt_at is not None
+    db.execute(delete(EmailOutbox))
+    db.commit()
+
+
+def test_email_worker_fails_refused_recipients_right_away(db: Session) -> None:
+    (email,) = _queue(db, 1)
+    with smtp_stand_in() as server:
+        server.rcpt_reply = "550 No such user"
+        worker = _worker(server)
+        connection = worker.connection_factory()
+        assert asyncio.run(worker.run_once(connection)) == 1
+        connection.close()
+
+    db.refresh(email)
+    assert email.status == EMAIL_FAILED
+    assert email.attempts == 1
+    assert email.last_error and "550" in email.last_error
+    assert email.html_content == ""
+    db.execute(delete(EmailOutbox))
+    db.commit()
+
+def test_email_worker_purges_old_delivered_emails(db: Session) -> None:
+    old_sent, old_pending, recent_sent = _queue(db, 3)
+    long_ago = datetime.now(timezone.utc) - timedelta(days=31)
+    old_sent.status = EMAIL_SENT
+    old_sent.created_at = long_ago
+    old_pending.created_at = long_ago
+    recent_sent.status = EMAIL_SENT
+    db.add_all([old_sent, old_pending, recent_sent])
+    db.commit()
+    with smtp_stand_in() as server:
+        assert _worker(server).purge() == 1
+
+    remaining = db.exec(select(EmailOutbox.id)).all()
+    assert sorted(remaining) == sorted([old_pending.id, recent_sent.id])
+    db.execute(delete(EmailOutbox))
+    db.commit()
+
+
+def test_email_worker_purges_once_per_interval() -> None:
+    with smtp_stand_in() as server:
+        worker = _worker(server)
+    # Idle polls of every task share the interval, only the first one purges
+    assert worker._purge_due()
+    assert not worker._purge_due()
+    worker.purge_interval_seconds = 0
+    assert worker._purge_due()
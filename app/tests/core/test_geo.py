@@ -0,0 +1,35 @@
+from app.core.geo import (
+    bounding_box,
+    covering_geohashes,
+    geohash_encode,
+    haversine_distance,
+    zoom_to_precision,
+)
+
+
+def test_geohash_encode() -> None:
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash_encode(48.8566, 2.3522, 5) == "u09tv"
+
+
+def test_covering_geohashes_contain_points_in_bbox() -> None:
+    cells = covering_geohashes(48.80, 2.25, 48.90, 2.42)
+    assert len(cells) <= 16
+    for latitude, longitude in [(48.80, 2.25), (48.85, 2.35), (48.90, 2.42)]:
+        geohash = geohash_encode(latitude, longitude)
+        assert any(geohash.startswith(cell) for cell in cells)
+
+
+def test_bounding_box_encloses_radius() -> None:
+    min_lat, min_lon, max_lat, max_lon = bounding_box(48.85, 2.35, 1000)
+    assert haversine_distance(48.85, 2.35, max_lat, 2.35) >= 999
+    assert haversine_distance(48.85, 2.35, 48.85, max_lon) >= 999
+    assert min_lat < 48.85 < max_lat
+    assert min_lon < 2.35 < max_lon
+
+
+def test_zoom_to_precision() -> None:
+    assert zoom_to_precision(0) == 1
+    assert zoom_to_precision(10) == 4
+    assert zoom_to_precision(22) == 7
+    assert all(zoom_to_precision(z) <= zoom_to_precision(z + 1) for z in range(22))
@@ -0,0 +1,62 @@
+import time
+
+from app.core.cache import TTLCache
+from app.core.geocoding import GeocodingCache, normalize_query
+from app.models import AddressResponse
+from app.tests.utils.utils import record_statements
+
+
+def test_normalize_query() -> None:
+    assert normalize_query("  12 Rue de RIVOLI,  Paris ") == "12 rue de rivoli paris"
+    assert normalize_query("１２ rue") == normalize_query("12 Rue")
+
+
+def test_ttl_cache_lru_eviction() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_cache_expiration() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats.expirations == 1
+
+
+def test_geocoding_cache_counters() -> None:
+    cache = GeocodingCache(max_entries=10, ttl_seconds=60, shared=False)
+    response = AddressResponse(query="12 rue de rivoli")
+    assert cache.get("12 Rue de Rivoli") is None
+    cache.set("12 Rue de Rivoli", response)
+    assert cache.get("12 rue de  rivoli") == response
+    stats = cache.stats()
+    assert stats.local_hits == 1
+    assert stats.misses == 1
+    assert stats.size == 1
+
+
+def test_geocoding_cache_many_use_one_shared_lookup() -> None:
+    writer = GeocodingCache(max_entries=10, ttl_seconds=60, shared=True)
+    reader = GeocodingCache(max_entries=10, ttl_seconds=60, shared=True)
+    writer.clear()
+    writer.set_many({
+        "1 Rue A": AddressResponse(query="1 rue a"),
+        "2 Rue B": AddressResponse(query="2 rue b"),
+    })
+    with record_statements() as statements:
+        found = reader.get_many(["1 rue a", "2 RUE B", "3 rue c"])
+    assert len(statements) == 1
+    assert {query: response.query for query, response in found.items()} == {
+        "1 rue a": "1 rue a",
+        "2 RUE B": "2 rue b",
+    }
+    assert reader.stats().shared_hits == 2
+    writer.clear()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from sqlmodel import Session
+
+from app.core import geocoding_worker as worker_module
+from app.core.geocoding_worker import GeocodingWorker
+from app.models import (
+    GEOCODE_DONE,
+    GEOCODE_FAILED,
+    GEOCODE_NOT_FOUND,
+    GEOCODE_PENDING,
+    DropOffPoint,
+)
+from app.tests.utils.drop_off_point import create_random_drop_off_point
+
+
+def _worker(max_attempts: int = 3) -> GeocodingWorker:
+    return GeocodingWorker(
+        concurrency=1,
+        batch_size=1000,
+        poll_seconds=1,
+        lease_seconds=60,
+        max_attempts=max_attempts,
+        retry_backoff_seconds=60,
+    )
+
+
+def test_run_once_fills_coordinates(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    drop_off_point = create_random_drop_off_point(db)
+    assert drop_off_point.geocode_status == GEOCODE_PENDING
+
+    async def fake_geocode_many(addresses: list[str]) -> dict[str, tuple[float, float] | None]:
+        return dict.fromkeys(addresses, (2.35, 48.85))
+
+    monkeypatch.setattr(worker_module, "geocode_many", fake_geocode_many)
+    assert asyncio.run(_worker().run_once()) >= 1
+
+    db.expire_all()
+    stored = db.get(DropOffPoint, drop_off_point.id)
+    assert stored
+    assert stored.geocode_status == GEOCODE_DONE
+    assert stored.longitude == 2.35
+    assert stored.latitude == 48.85
+
+
+def test_run_once_retries_then_fails(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    drop_off_point = create_random_drop_off_point(db)
+
+    async def failing_geocode_many(_addresses: list[str]) -> dict[str, tuple[float, float] | None]:
+        # Addok unreachable: nothing could be looked up
+        return {}
+
+    monkeypatch.setattr(worker_module, "geocode_many", failing_geocode_many)
+    worker = _worker(max_attempts=2)
+    asyncio.run(worker.run_once())
+
+    db.expire_all()
+    stored = db.get(DropOffPoint, drop_off_point.id)
+    assert stored
+    assert stored.geocode_status == GEOCODE_PENDING
+    assert stored.geocode_attempts == 1
+    assert stored.geocode_next_attempt_at is not None
+
+    # Make the retry due right away
+    stored.geocode_next_attempt_at = None
+    db.add(stored)
+    db.commit()
+    asyncio.run(worker.run_once())
+
+    db.expire_all()
+    stored = db.get(DropOffPoint, drop_off_point.id)
+    assert stored
+    assert stored.geocode_status == GEOCODE_FAILED
+    assert stored.latitude is None
+
+
+def test_run_once_marks_unmatched_addresses_not_found(
+    db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    drop_off_point = create_random_drop_off_point(db)
+
+    async def unmatched_geocode_many(addresses: list[str]) -> dict[str, tuple[float, float] | None]:
+        return dict.fromkeys(addresses)
+
+    monkeypatch.setattr(worker_module, "geocode_many", unmatched_geocode_many)
+    asyncio.run(_worker().run_once())
+
+    db.expire_all()
+    stored = db.get(DropOffPoint, drop_off_point.id)
+    assert stored
+    assert stored.geocode_status == GEOCODE_NOT_FOUND
+    assert stored.geocode_attempts == 0
+    assert stored.geocode_next_attempt_at is None
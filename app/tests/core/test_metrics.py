@@ -0,0 +1,67 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.addok import AddokError, addok_client
+from app.core.config import settings
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    merge_snapshots,
+    metrics,
+)
+from app.core.principals import principal_cache
+
+
+def test_registry_renders_merged_workers() -> None:
+    registry = MetricsRegistry(None, flush_seconds=5)
+    requests = Counter(registry, "requests_total", "Requests.", ["route"])
+    latency = Histogram(registry, "latency_seconds", "Latency.", ["route"], buckets=(0.1, 1))
+    requests.inc("a")
+    latency.observe(0.05, "a")
+    latency.observe(5, "a")
+    # A second worker reporting the same series
+    merged = merge_snapshots([registry.snapshot(), registry.snapshot()])
+
+    text = registry.render(merged)
+    assert 'requests_total{route="a"} 2' in text
+    assert 'latency_seconds_bucket{route="a",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="a",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{route="a"} 10.1' in text
+    assert 'latency_seconds_count{route="a"} 4' in text
+
+
+def test_metrics_endpoint(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    metrics.clear()
+    # The user is then loaded from the database
+    principal_cache.clear()
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    assert r.status_code == 200
+
+    async def failing_search(_query: str) -> None:
+        raise AddokError("Addok unavailable", status_code=503)
+
+    monkeypatch.setattr(addok_client, "search", failing_search)
+    r = client.get(f"{settings.API_V1_STR}/address/search", params={"query": "metrics error"})
+    assert r.status_code == 502
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'http_requests_total{route="users-read_user_me",method="GET",status="200"}' in text
+    assert 'http_request_duration_seconds_count{route="users-read_user_me"}' in text
+    assert 'http_request_db_statements_count{route="users-read_user_me"} 1' in text
+    assert 'http_request_db_statements_bucket{route="users-read_user_me",le="0"} 0' in text
+    statements_sum = next(
+        line
+        for line in text.splitlines()
+        if line.startswith('http_request_db_statements_sum{route="users-read_user_me"}')
+    )
+    assert float(statements_sum.split()[-1]) > 0
+    assert 'address_search_duration_seconds_count{outcome="error"}' in text
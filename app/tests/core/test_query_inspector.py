@@ -0,0 +1,70 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session, text
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.query_inspector import (
+    QueryBudgetExceeded,
+    QueryInspectorMiddleware,
+    query_budget,
+    statement_shape,
+)
+
+
+def _inspected_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryInspectorMiddleware)
+
+    @app.get("/loop/{count}", dependencies=[query_budget(3)])
+    def run_in_loop(count: int) -> int:
+        with Session(engine) as session:
+            for i in range(count):
+                session.exec(text("SELECT :i"), params={"i": i})  # type: ignore[call-overload]
+        return count
+
+    return app
+
+
+def test_statement_shape_ignores_parameter_counts() -> None:
+    assert statement_shape("SELECT x\n  FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == (
+        statement_shape("SELECT x FROM t WHERE id IN (%(id_1_1)s)")
+    )
+
+
+def test_repeated_statements_are_logged(
+    caplog: pytest.LogCaptureFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "QUERY_INSPECTOR_MAX_DUPLICATES", 2)
+    with TestClient(_inspected_app()) as client, caplog.at_level(logging.WARNING):
+        assert client.get("/loop/2").status_code == 200
+        assert not caplog.records
+        assert client.get("/loop/3").status_code == 200
+    assert len(caplog.records) == 1
+    assert "3 times: SELECT %(i)s" in caplog.records[0].getMessage()
+
+
+def test_query_budget_fails_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "QUERY_INSPECTOR_MAX_DUPLICATES", 100)
+    with TestClient(_inspected_app()) as client:
+        assert client.get("/loop/3").status_code == 200
+        with pytest.raises(QueryBudgetExceeded, match="over its budget of 3 statements"):
+            client.get("/loop/4")
+
+
+def test_metrics_and_inspector_share_statement_counts(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "QUERY_INSPECTOR_MAX_DUPLICATES", 100)
+    app = _inspected_app()
+    app.add_middleware(MetricsMiddleware)
+    metrics.clear()
+    with TestClient(app) as client:
+        assert client.get("/loop/3").status_code == 200
+        with pytest.raises(QueryBudgetExceeded, match="ran 4 statements"):
+            client.get("/loop/4")
+    [[_labels, value]] = metrics.snapshot()["http_request_db_statements"]
+    # Histogram values end with the sum and the count
+    assert value[-2:] == [7, 2]
@@ -0,0 +1,27 @@
+import time
+
+from app.core.rate_limit import MemoryRateLimitStore, RateLimiter
+
+
+def test_rate_limiter_allows_burst_then_throttles() -> None:
+    limiter = RateLimiter(MemoryRateLimitStore(max_entries=10), attempts=3, period_seconds=60)
+    assert [limiter.hit("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit("a") == 20
+    assert limiter.hit("b") == 0
+    limiter.reset("a")
+    assert limiter.hit("a") == 0
+
+
+def test_rate_limiter_refills() -> None:
+    limiter = RateLimiter(MemoryRateLimitStore(max_entries=10), attempts=1, period_seconds=0.05)
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") > 0
+    time.sleep(0.06)
+    assert limiter.hit("a") == 0
+
+
+def test_memory_store_is_bounded() -> None:
+    store = MemoryRateLimitStore(max_entries=2)
+    for key in ["a", "b", "c"]:
+        store.take(key, capacity=1, refill_per_second=1)
+    assert store.take("a", capacity=1, refill_per_second=1) == 0
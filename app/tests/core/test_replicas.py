@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.replicas import LAST_WRITE_COOKIE, Replica, ReplicaRouter, replica_router
+from app.tests.utils.user import user_authentication_headers
+from app.tests.utils.utils import random_email, random_lower_string, record_statements
+
+# Nothing listens there, connecting fails right away
+UNREACHABLE_URI = "postgresql+psycopg://nobody@127.0.0.1:1/nothing"
+
+
+def _replica(name: str, url: str) -> Replica:
+    return Replica(name=name, engine=create_engine(url), async_engine=create_async_engine(url))
+
+
+@pytest.fixture
+def replicas() -> Generator[list[Replica], None, None]:
+    # The test database stands in for a healthy replica
+    created = [
+        _replica("down", UNREACHABLE_URI),
+        _replica("up", str(settings.SQLALCHEMY_DATABASE_URI)),
+    ]
+    yield created
+    for replica in created:
+        replica.engine.dispose()
+        # Its connections belong to the client's event loop, only drop them
+        asyncio.run(replica.async_engine.dispose(close=False))
+
+
+def test_router_round_robin_and_stickiness(replicas: list[Replica]) -> None:
+    router = ReplicaRouter(replicas, retry_seconds=60, sticky_seconds=60, sticky_max_entries=10)
+    first = router.candidates({})
+    second = router.candidates({})
+    assert [r.name for r in first] != [r.name for r in second]
+    assert {r.name for r in first} == {"down", "up"}
+
+    router.mark_down(replicas[0])
+    assert [r.name for r in router.candidates({})] == ["up"]
+
+    assert router.candidates({LAST_WRITE_COOKIE: str(time.time())}) == []
+    assert [r.name for r in router.candidates({LAST_WRITE_COOKIE: str(time.time() - 120)})] == ["up"]
+    assert [r.name for r in router.candidates({LAST_WRITE_COOKIE: "garbage"})] == ["up"]
+
+
+def test_read_routes_skip_failed_replica_and_stick_after_write(
+    client: TestClient, replicas: list[Replica], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(replica_router, "replicas", replicas)
+    email = random_email()
+    password = random_lower_string()
+    r = client.post(
+        f"{settings.API_V1_STR}/users/signup",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    headers = user_authentication_headers(client=client, email=email, password=password)
+    client.cookies.clear()
+
+    for _ in range(2):
+        r = client.get(f"{settings.API_V1_STR}/drop-off-points/", headers=headers)
+        assert r.status_code == 200
+    assert replicas[0].down_until > 0
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me", headers=headers, json={"full_name": "Sticky"}
+    )
+    assert r.status_code == 200
+    assert LAST_WRITE_COOKIE in r.cookies
+
+    # The cookie comes back with the next request, whichever worker serves it
+    with record_statements() as statements:
+        r = client.get(f"{settings.API_V1_STR}/drop-off-points/", headers=headers)
+        assert r.status_code == 200
+    assert any("dropoffpoint" in statement for statement in statements)
+    # Without the cookie, the worker that took the write knows the token
+    client.cookies.clear()
+    with record_statements() as statements:
+        client.get(f"{settings.API_V1_STR}/drop-off-points/", headers=headers)
+    assert any("dropoffpoint" in statement for statement in statements)
+    # Another worker does not
+    monkeypatch.setattr(replica_router, "_writes", OrderedDict())
+    with record_statements() as statements:
+        client.get(f"{settings.API_V1_STR}/drop-off-points/", headers=headers)
+    assert not any("dropoffpoint" in statement for statement in statements)
+
+
+def test_router_sticks_token_subjects_after_write(replicas: list[Replica]) -> None:
+    router = ReplicaRouter(replicas, retry_seconds=60, sticky_seconds=60, sticky_max_entries=1)
+    with Session(engine) as first, Session(engine) as second:
+        router.track_writes(first, Response(), "first")
+        router.track_writes(second, Response(), "second")
+        first.commit()
+        assert router.candidates({}, "first") == []
+        assert router.candidates({}, "second")
+        # The oldest subject is forgotten past sticky_max_entries
+        second.commit()
+        assert router.candidates({}, "second") == []
+        assert router.candidates({}, "first")
+
+
+def test_only_request_sessions_set_the_cookie(replicas: list[Replica], db: Session) -> None:
+    router = ReplicaRouter(replicas, retry_seconds=60, sticky_seconds=60, sticky_max_entries=10)
+    response = Response()
+    with Session(engine) as session:
+        router.track_writes(session, response)
+        # A background worker's session
+        db.commit()
+        assert "set-cookie" not in response.headers
+        session.commit()
+    assert LAST_WRITE_COOKIE in response.headers["set-cookie"]
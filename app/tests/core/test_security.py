@@ -0,0 +1,57 @@
+import asyncio
+import importlib.util
+import threading
+
+import pytest
+from passlib.exc import MissingBackendError
+
+from app.core import security
+from app.core.security import PasswordHasher, PasswordHasherBusy, build_pwd_context
+
+
+def test_password_hasher_round_trip() -> None:
+    hasher = PasswordHasher(workers=1, max_pending=4)
+    try:
+        hashed = hasher.hash("correct horse")
+        assert hasher.verify("correct horse", hashed)
+        assert not asyncio.run(hasher.averify("wrong horse", hashed))
+        stats = hasher.stats()
+        assert stats.completed == 3
+        assert stats.pending == 0
+        assert stats.max_seconds > 0
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_rejects_when_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash(password: str) -> str:
+        started.set()
+        release.wait()
+        return password
+
+    monkeypatch.setattr(security, "_hash_password", slow_hash)
+    hasher = PasswordHasher(workers=0, max_pending=1)
+    thread = threading.Thread(target=hasher.hash, args=("first",))
+    thread.start()
+    started.wait()
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash("second")
+    release.set()
+    thread.join()
+    assert hasher.stats().rejected == 1
+    assert hasher.stats().pending == 0
+
+
+@pytest.mark.skipif(importlib.util.find_spec("argon2") is not None, reason="argon2-cffi is installed")
+def test_build_pwd_context_requires_scheme_backend() -> None:
+    with pytest.raises(MissingBackendError):
+        build_pwd_context(
+            scheme="argon2",
+            bcrypt_rounds=4,
+            argon2_time_cost=1,
+            argon2_memory_cost=1024,
+            argon2_parallelism=1,
+        )
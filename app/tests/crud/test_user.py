@@ -1,8 +1,13 @@
+import asyncio
+
 from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
-from app.core.security import verify_password
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.security import build_pwd_context, verify_password
 from app.models import User, UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
@@ -26,6 +31,47 @@ def test_authenticate_user(db: Session) -> None:
     assert user.email == authenticated_user.email
 
 
+def test_aauthenticate_user(db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = crud.create_user(session=db, user_create=UserCreate(email=email, password=password))
+
+    async def authenticate() -> User | None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            authenticated_user = await crud.aauthenticate(
+                session=session, email=email, password=password
+            )
+        # The pooled connections belong to this event loop
+        await async_engine.dispose()
+        return authenticated_user
+
+    authenticated_user = asyncio.run(authenticate())
+    assert authenticated_user
+    assert authenticated_user.id == user.id
+
+
+def test_authenticate_user_upgrades_outdated_hash(db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = crud.create_user(session=db, user_create=UserCreate(email=email, password=password))
+    weaker_context = build_pwd_context(
+        scheme="bcrypt",
+        bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS - 1,
+        argon2_time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2_memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+        argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+    outdated_hash = weaker_context.hash(password)
+    user.hashed_password = outdated_hash
+    db.add(user)
+    db.commit()
+
+    authenticated_user = crud.authenticate(session=db, email=email, password=password)
+    assert authenticated_user
+    assert authenticated_user.hashed_password != outdated_hash
+    assert verify_password(password, authenticated_user.hashed_password)
+
+
 def test_not_authenticate_user(db: Session) -> None:
     email = random_email()
     password = random_lower_string()
@@ -0,0 +1,80 @@
+import socketserver
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SMTPStandIn:
+    """
+    What the local SMTP server saw: one entry per accepted message.
+    """
+
+    host: str
+    port: int
+    connections: int = 0
+    messages: list[tuple[str, list[str], str]] = field(default_factory=list)
+    # Status code to answer RCPT TO with, to simulate a refusing relay
+    rcpt_reply: str = "250 OK"
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    server: "_SMTPServer"
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        state = self.server.state
+        state.connections += 1
+        self._reply("220 localhost stand-in")
+        mail_from = ""
+        recipients: list[str] = []
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 localhost")
+            elif verb == "MAIL":
+                mail_from, recipients = command.split(":", 1)[1].strip(" <>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip(" <>"))
+                self._reply(state.rcpt_reply)
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (data_line := self.rfile.readline()) not in (b".\r\n", b""):
+                    data.append(data_line.decode())
+                state.messages.append((mail_from, recipients, "".join(data)))
+                self._reply("250 OK")
+            elif verb in ("NOOP", "RSET"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    state: SMTPStandIn
+
+
+@contextmanager
+def smtp_stand_in() -> Generator[SMTPStandIn, None, None]:
+    """
+    Minimal SMTP server on a free local port, enough for smtplib's plain sessions.
+    """
+    with _SMTPServer(("127.0.0.1", 0), _SMTPHandler) as server:
+        host, port = server.server_address[:2]
+        server.state = SMTPStandIn(host=str(host), port=int(port))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server.state
+        finally:
+            server.shutdown()
@@ -1,9 +1,15 @@
 import random
 import string
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
 
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.db import async_engine, engine
 
 
 def random_lower_string() -> str:
@@ -24,3 +30,40 @@ def get_superuser_token_headers(client: TestClient) -> dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+@contextmanager
+def record_statements() -> Generator[list[str], None, None]:
+    """
+    Collect the SQL statements sent to the database inside the block, by sync and async routes.
+    """
+    statements: list[str] = []
+
+    def before_cursor_execute(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        statements.append(statement)
+
+    engines = [engine, async_engine.sync_engine]
+    for recorded_engine in engines:
+        event.listen(recorded_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for recorded_engine in engines:
+            event.remove(recorded_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(db: Session, statement: Any) -> str:
+    """
+    Return the query plan of a statement with the default planner settings.
+
+    Tiny tables are read sequentially whatever their indexes, so callers fill
+    the tables in the session's transaction and ANALYZE them first. The
+    transaction is rolled back afterwards, rows and statistics included.
+    """
+    connection = db.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    try:
+        rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).all()
+    finally:
+        db.rollback()
+    return "\n".join(row[0] for row in rows)
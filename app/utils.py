@@ -1,19 +1,23 @@
+import asyncio
 import logging
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
+from jinja2 import BytecodeCache, Environment, FileSystemBytecodeCache, FileSystemLoader
 from jwt.exceptions import InvalidTokenError
+from sqlmodel import Session
 
 from app.core import security
+from app.core.addok import addok_client
 from app.core.config import settings
-from app.models import AddressResponse
-import requests
-
+from app.core.email_worker import email_worker
+from app.core.geocoding import geocoding_cache
+from app.core.metrics import address_search_duration_seconds
+from app.models import AddressResponse, EmailOutbox
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,37 +29,50 @@ class EmailData:
     subject: str
 
 
+def _email_templates_bytecode_cache() -> BytecodeCache | None:
+    if not settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR:
+        return None
+    directory = Path(settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(str(directory))
+
+
+# Each template is read and compiled once, then shared by every render, which
+# Jinja allows from any thread. Locally, edited templates are picked up again.
+email_templates = Environment(
+    loader=FileSystemLoader(Path(__file__).parent / "email-templates" / "build"),
+    auto_reload=settings.ENVIRONMENT == "local",
+    cache_size=-1,
+    bytecode_cache=_email_templates_bytecode_cache(),
+)
+
+
+def load_email_templates() -> None:
+    """
+    Compile every email template up front so no request pays for it.
+    """
+    for template_name in email_templates.list_templates(extensions=["html"]):
+        email_templates.get_template(template_name)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return email_templates.get_template(template_name).render(context)
 
 
 def send_email(
     *,
+    session: Session,
     email_to: str,
     subject: str = "",
     html_content: str = "",
 ) -> None:
+    """
+    Queue an email in the outbox, the email worker delivers it after the response.
+    """
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
-    )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
+    session.add(EmailOutbox(email_to=email_to, subject=subject, html_content=html_content))
+    session.commit()
+    email_worker.wake()
 
 
 def generate_test_email(email_to: str) -> EmailData:
@@ -85,9 +102,8 @@ def generate_reset_password_email(email_to: str, email: str, token: str) -> Emai
     return EmailData(html_content=html_content, subject=subject)
 
 
-def generate_new_account_email(
-    email_to: str, username: str, password: str
-) -> EmailData:
+def generate_new_account_email(email_to: str, username: str) -> EmailData:
+    # The password is never emailed, the outbox would keep it in clear
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - New account for user {username}"
     html_content = render_email_template(
@@ -95,7 +111,6 @@ def generate_new_account_email(
         context={
             "project_name": settings.PROJECT_NAME,
             "username": username,
-            "password": password,
             "email": email_to,
             "link": settings.FRONTEND_HOST,
         },
@@ -126,6 +141,63 @@ def verify_password_reset_token(token: str) -> str | None:
         return None
 
 
-def address_search(query: str) -> AddressResponse:
-    response = requests.get(f"{settings.ADDOK_API_URL}/search?q={query}")
-    return AddressResponse.model_validate(response.json())
+async def address_search(query: str) -> AddressResponse:
+    started = time.perf_counter()
+    cached = await geocoding_cache.aget(query)
+    if cached is not None:
+        address_search_duration_seconds.observe(time.perf_counter() - started, "hit")
+        return cached
+    # Failed lookups raise AddokError and are never cached
+    try:
+        address_response = await addok_client.search(query)
+    except Exception:
+        address_search_duration_seconds.observe(time.perf_counter() - started, "error")
+        raise
+    await geocoding_cache.aset(query, address_response)
+    address_search_duration_seconds.observe(time.perf_counter() - started, "miss")
+    return address_response
+
+
+async def geocode_many(addresses: list[str]) -> dict[str, tuple[float, float] | None]:
+    """
+    Geocode a batch of addresses, returning (longitude, latitude) per distinct address.
+
+    Cached addresses are served from the geocoding cache with one lookup, the
+    rest are sent to Addok's CSV endpoint in chunks that run concurrently,
+    bounded by the client's concurrency limit, and written back to the cache.
+    Addresses Addok found no match for map to None, addresses of a failed
+    chunk are left out so callers can tell them apart and try again later.
+    """
+    results: dict[str, tuple[float, float] | None] = {}
+    pending: list[str] = []
+    cached_responses = await geocoding_cache.aget_many(list(dict.fromkeys(addresses)))
+    for address in dict.fromkeys(addresses):
+        cached = cached_responses.get(address)
+        if cached is None:
+            pending.append(address)
+        elif cached.features and cached.features[0].geometry:
+            longitude, latitude = cached.features[0].geometry.coordinates
+            results[address] = (longitude, latitude)
+        else:
+            results[address] = None
+
+    chunk_size = settings.ADDOK_CSV_CHUNK_SIZE
+    chunks = [pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    chunk_results = await asyncio.gather(
+        *(addok_client.search_csv(chunk) for chunk in chunks), return_exceptions=True
+    )
+    found: dict[str, AddressResponse] = {}
+    for chunk, chunk_result in zip(chunks, chunk_results, strict=True):
+        if isinstance(chunk_result, BaseException):
+            logger.error(f"Error geocoding {len(chunk)} addresses: {chunk_result}")
+            continue
+        for address, feature in zip(chunk, chunk_result, strict=True):
+            if feature is None or feature.geometry is None:
+                results[address] = None
+                found[address] = AddressResponse(type="FeatureCollection", features=[], query=address)
+                continue
+            longitude, latitude = feature.geometry.coordinates
+            results[address] = (longitude, latitude)
+            found[address] = AddressResponse(type="FeatureCollection", features=[feature], query=address)
+    await geocoding_cache.aset_many(found)
+    return results
@@ -11,3 +11,8 @@ alembic upgrade head
 
 # Create initial data in DB
 python app/initial_data.py
+
+# Drop metrics left by the previous workers
+if [ -n "$METRICS_MULTIPROC_DIR" ]; then
+    rm -f "$METRICS_MULTIPROC_DIR"/metrics_*.json
+fi